@@ -1,150 +1,199 @@
+import sys
+
+if __name__ == "__main__" and "streamlit" not in sys.modules:
+    # Plain `python ankle_fitness_app.py ...` runs the history CLI; `streamlit run` has already
+    # imported Streamlit, so this never triggers there and the CLI never pays for the UI imports
+    from workout_cli import cli
+    sys.exit(cli())
+
 import streamlit as st
-from datetime import date, datetime
-from typing import Dict, Any, List, Optional
-
-# --- 1. Workout Data Structure (Unchanged) ---
-
-WORKOUT_DATA: Dict[str, Any] = {
-    'warmup': {
-        'title': "Warmup",
-        'icon': "🕰️",
-        'options': {
-            # Warmup is standardized as Option A
-            'A': {
-                'title': "Standard Warmup",
-                'description': "Prepare your ankles with gentle movement.",
-                'progression': [
-                    {'name': "Ankle Circles (Each Direction)", 'sets': 2, 'time': 30, 'unit': "s", 'detail': "Slow, controlled circles to mobilize the joint."},
-                    {'name': "Toe Taps (Alternating)", 'sets': 2, 'time': 60, 'unit': "s", 'detail': "Lift toes up and down rapidly to activate shin muscles."},
-                ],
-            },
-        },
-    },
-    'plyometrics': {
-        'title': "Plyometrics",
-        'icon': "⚡",
-        'options': {
-            'A': {
-                'title': "Hopping Progression",
-                'description': "Hopping: Focus on quick ground contact and elastic energy.",
-                'progression': [
-                    {'name': "Double Leg Hops In Place", 'sets': 3, 'time': 30, 'unit': "s", 'detail': "Soft landing, minimal knee bend."},
-                    {'name': "Double Leg Hops Forward/Backward", 'sets': 3, 'time': 30, 'unit': "s", 'detail': "Short, quick jumps maintaining control."},
-                    {'name': "Double Leg Hops Side-to-Side", 'sets': 3, 'time': 30, 'unit': "s", 'detail': "Focus on controlled lateral movement."},
-                    {'name': "Single Leg Hops In Place (Each Leg)", 'sets': 3, 'time': 30, 'unit': "s", 'detail': "Requires stability and power."},
-                ],
-            },
-            'B': {
-                'title': "Jumping Progression (Higher Intensity)",
-                'description': "Jumping: Focus on maximal vertical and horizontal power.",
-                'progression': [
-                    {'name': "Vertical Jump", 'sets': 3, 'reps': 8, 'unit': "reps", 'detail': "Explode up, land soft."},
-                    {'name': "Vertical Jump (2-to-1 Leg Landing)", 'sets': 3, 'reps': 8, 'unit': "reps", 'detail': "Jump on two feet, land and stabilize on one."},
-                    {'name': "Single Leg Jumps In Place (Each Leg)", 'sets': 3, 'reps': 6, 'unit': "reps", 'detail': "Controlled landing for maximum stability."},
-                    {'name': "Single Leg Jumps (Forward/Lateral/Diagonal)", 'sets': 3, 'reps': 6, 'unit': "reps", 'detail': "Focus on directional control and quickness."},
-                ],
-            },
-        },
-    },
-    'lowerStrength': {
-        'title': "Lower Extremity Strength",
-        'icon': "💪",
-        'options': {
-            'A': {
-                'title': "Single Leg RDL",
-                'description': "Build hip and hamstring strength while challenging ankle stability.",
-                'progression': [
-                    {'name': "Single Leg RDL (Each Leg)", 'sets': 3, 'reps': 12, 'unit': "reps", 'detail': "Keep back flat, extend trailing leg, focus on balance."},
-                ],
-            },
-            'B': {
-                'title': "Lateral Step Down (Higher Challenge)",
-                'description': "Focus on eccentric control of the quad and ankle stabilizers, increase height.",
-                'progression': [
-                    {'name': "Lateral Step Down (Each Leg)", 'sets': 3, 'reps': 12, 'unit': "reps", 'detail': "Control the movement down, increasing step height as you progress."},
-                ],
-            },
-        },
-    },
-    'dynamicBalance': {
-        'title': "Dynamic Balance",
-        'icon': "🚶",
-        'options': {
-            'A': {
-                'title': "Reach with Feet (Fundamental)",
-                'description': "Challenge balance and hip mobility by reaching with the non-stance foot (Star Excursion).",
-                'progression': [
-                    {'name': "Reach with Feet (Each Leg)", 'sets': 3, 'time': 45, 'unit': "s", 'detail': "Reach with non-stance foot in various directions (forward, lateral, diagonal)."},
-                ],
-            },
-            'B': {
-                'title': "Reach with Hands (Perturbation)",
-                'description': "Use an external object (like a light ball) to create dynamic perturbation.",
-                'progression': [
-                    {'name': "Reach with Hands (Each Leg)", 'sets': 3, 'time': 45, 'unit': "s", 'detail': "Maintain single-leg stance while reaching and controlling an object."},
-                ],
-            },
-        },
-    },
-    'staticBalance': {
-        'title': "Static Balance",
-        'icon': "🧘",
-        'options': {
-            'A': {
-                'title': "Eyes Open Progression",
-                'description': "Relying on visual and somatosensory input.",
-                'progression': [
-                    {'name': "Arms Across Chest, Hard Ground (Each Leg)", 'sets': 3, 'time': 60, 'unit': "s", 'detail': "Avoid touching down, excessive trunk motion, or bracing non-stance limb. (Errors to avoid)"},
-                    {'name': "Arms Across Chest, Foam Pad (Each Leg)", 'sets': 3, 'time': 60, 'unit': "s", 'detail': "Same stance, increased difficulty due to foam pad."},
-                    {'name': "Kettlebell Pass, Foam Pad (Each Leg)", 'sets': 3, 'time': 60, 'unit': "s", 'detail': "Single leg stance while passing a light kettlebell side-to-side."},
-                ],
-            },
-            'B': {
-                'title': "Eyes Closed Progression (Advanced)",
-                'description': "Highest level of challenge, relying entirely on somatosensory input.",
-                'progression': [
-                    {'name': "Eyes Closed, Hard Ground (Each Leg)", 'sets': 3, 'time': 60, 'unit': "s", 'detail': "Touch down is a major error."},
-                    {'name': "Eyes Closed, Foam Pad (Each Leg)", 'sets': 3, 'time': 60, 'unit': "s", 'detail': "Eyes closed on an unstable surface."},
-                ],
-            },
-        },
-    },
-    'ankleStrength': {
-        'title': "Ankle Specific Strength",
-        'icon': "🦶",
-        'options': {
-            'A': {
-                'title': "Banded Eversion & Dorsiflexion",
-                'description': "Targeting key muscles responsible for ankle stability (Option A: Eversion & Dorsiflexion).",
-                'progression': [
-                    {'name': "Banded Eversion (Each Leg)", 'sets': 3, 'reps': 25, 'unit': "reps", 'detail': "Pull foot outwards against band resistance."},
-                    {'name': "Banded/Weighted Dorsiflexion (Each Leg)", 'sets': 3, 'reps': 25, 'unit': "reps", 'detail': "Pull foot upwards (toe to sky) against resistance."},
-                ],
-            },
-            'B': {
-                'title': "Single Leg Heel Raise Progression",
-                'description': "Building calf strength and control through progressive overload (Option B: Heel Raise).",
-                'progression': [
-                    {'name': "Single Leg Heel Raise (Flat Ground)", 'sets': 3, 'reps': 12, 'unit': "reps", 'detail': "Balance and control are key."},
-                    {'name': "Single Leg Heel Raise (On Step)", 'sets': 3, 'reps': 12, 'unit': "reps", 'detail': "Allows for full range of motion (deep stretch)."},
-                    {'name': "Single Leg Heel Raise (On Step w/ Weight)", 'sets': 3, 'reps': 12, 'unit': "reps", 'detail': "Use a dumbbell for added resistance."},
-                ],
-            },
-        },
-    },
-}
-
-# The sequence for the full workout session
-MAIN_MODULE_KEYS = ['plyometrics', 'lowerStrength', 'dynamicBalance', 'staticBalance', 'ankleStrength']
-FULL_SEQUENCE_KEYS = ['warmup'] + MAIN_MODULE_KEYS
-
-
-# --- 2. State Management Functions ---
+import csv
+import hmac
+import io
+import os
+import time
+import uuid
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from clinic_roster import ClinicRoster
+from instrumentation import ADMIN_TOKEN_ENV, deep_sizeof, instruments
+from log_store import HistoryWindow, SetEvent, SQLiteLogStore, WorkoutLogStore
+from log_transfer import EXPORT_FORMATS, detect_format, import_entries, parse_rows, write_export
+from program_scheduler import DayPlan, ProgramScheduler
+from resume_token import RESUMABLE_VIEWS, ResumeState, decode_resume_token, encode_resume_token
+from routine_metrics import ModuleLoad, RoutineMetrics, build_metrics_table
+from set_events import SetEventWriter
+from ui_assets import CardKey, build_card_table, minify_css, render_exercise_card
+from user_registry import ContactAlreadyRegistered, UserRecord, UserRegistry
+from workout_catalog import CATALOG_PATH, Catalog, CatalogReloader, Exercise
+from workout_engine import PlanStep, WorkoutEngine
+
+if TYPE_CHECKING:
+    from workout_analytics import TrainingLoadAnalytics
+
+# Number of sessions the sidebar history shows per page
+HISTORY_PAGE_SIZE = 20
+
+# Number of most recent weeks charted on the analytics page
+ANALYTICS_WEEKS = 12
+
+# Number of weeks the program calendar shows, starting with last week
+PROGRAM_WEEKS = 8
+
+# Query-string parameter holding the compact resume token
+RESUME_PARAM = "s"
+
+# How often the server checks a running countdown; the visible ticking happens client-side
+TIMER_CHECK_SECONDS = 2
+
+
+# --- 1. State Management Functions ---
+
+@st.cache_resource
+def get_catalog_reloader() -> CatalogReloader:
+    """Returns the process-wide catalog holder shared by every session."""
+    return CatalogReloader(CATALOG_PATH)
+
+def get_catalog() -> Catalog:
+    """Returns the current catalog, reloading it only when the file's mtime changes.
+
+    A broken edit keeps the last good catalog in service; admins see the error in the sidebar.
+    """
+    return get_catalog_reloader().current()
+
+@st.cache_resource(max_entries=2)
+def get_metrics_table(catalog_version: str, _catalog: Catalog) -> Tuple[RoutineMetrics, ...]:
+    """Precomputes the metrics of every A/B routine once per catalog version."""
+    return build_metrics_table(_catalog)
+
+@st.cache_resource(max_entries=2)
+def get_card_table(catalog_version: str, _catalog: Catalog) -> Dict[CardKey, str]:
+    """Pre-renders every workout card once per catalog version."""
+    return build_card_table(_catalog)
+
+def exercise_card_html(step: PlanStep, catalog_version: str) -> str:
+    """Looks up the step's pre-rendered card; only a plan from a replaced catalog renders its own."""
+    catalog = get_catalog()
+    if catalog_version != catalog.version:
+        return render_exercise_card(step.exercise, step.exercise_index, step.exercise_count, step.set_number)
+    return get_card_table(catalog.version, catalog)[(step.module.id, step.option.key, step.exercise_index, step.set_number)]
+
+@st.cache_resource
+def get_log_store() -> WorkoutLogStore:
+    """Returns the workout log backend shared by every session of this server process."""
+    return SQLiteLogStore()
+
+@st.cache_resource
+def get_user_registry() -> UserRegistry:
+    """Returns the process-wide registry of returning users, stored alongside the workout log."""
+    return UserRegistry(get_log_store().pool)
+
+@st.cache_resource
+def get_program_scheduler() -> ProgramScheduler:
+    """Returns the process-wide cache of multi-week programs, one per user and catalog version."""
+    return ProgramScheduler(get_log_store())
+
+@st.cache_resource
+def get_clinic_roster() -> ClinicRoster:
+    """Returns the process-wide cache of per-patient summaries behind the clinician roster."""
+    return ClinicRoster(get_log_store(), get_user_registry(), get_program_scheduler())
+
+def get_day_plan(day: date) -> DayPlan:
+    return get_program_scheduler().plan_for(st.session_state.user_key, get_catalog(), day)
+
+def apply_scheduled_routine():
+    """Pre-selects the routine the user's program plans for the selected date."""
+    if st.session_state.user_key is None:
+        return
+    plan = get_day_plan(st.session_state.selected_date)
+    st.session_state.engine.selected_options_map = get_catalog().routine_options(plan.routine_code)
+
+@st.cache_resource
+def get_event_writer() -> SetEventWriter:
+    """Returns the process-wide batched writer for per-set events."""
+    return SetEventWriter(get_log_store())
+
+def get_history_window() -> HistoryWindow:
+    """Returns this session's sorted history window, rebuilding it if the user changed."""
+    window = st.session_state.get('history_window')
+    module_keys = get_catalog().full_sequence_keys
+    if window is None or window.user != st.session_state.user_key or window.log.module_keys != module_keys:
+        window = HistoryWindow(get_log_store(), st.session_state.user_key, HISTORY_PAGE_SIZE, module_keys)
+        st.session_state.history_window = window
+        st.session_state.history_visible = HISTORY_PAGE_SIZE
+    return window
+
+def get_training_analytics() -> 'TrainingLoadAnalytics':
+    """Returns this session's training-load analytics, built in one pass and then kept current by appends."""
+    # NumPy is only imported once a session first opens analytics
+    from workout_analytics import TrainingLoadAnalytics
+    catalog = get_catalog()
+    key = (st.session_state.user_key, catalog.version)
+    if st.session_state.get('training_analytics_key') != key:
+        analytics = TrainingLoadAnalytics(catalog, get_metrics_table(catalog.version, catalog))
+        analytics.extend(get_log_store().iter_entries(st.session_state.user_key))
+        st.session_state.training_analytics = analytics
+        st.session_state.training_analytics_key = key
+    return st.session_state.training_analytics
+
+def show_more_history():
+    """Reveals the next page of the sidebar history, fetching it from the store if needed."""
+    window = get_history_window()
+    st.session_state.history_visible += HISTORY_PAGE_SIZE
+    if len(window) < st.session_state.history_visible:
+        window.load_more()
+
+def build_export_file(store: WorkoutLogStore, module_keys: Sequence[str], users: Optional[List[Optional[str]]],
+                      first_date: Optional[date], last_date: Optional[date], fmt: str) -> io.BytesIO:
+    """Streams an export into the download buffer chunk by chunk.
+
+    Streamlit serves downloads from memory, so the finished file is held
+    once; the rows are never all materialized as entries alongside it.
+    Called from Streamlit's download handler, outside any script run, so
+    it only uses what is passed in.
+    """
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+    entries = store.iter_range(
+        users,
+        first_date.isoformat() if first_date else None,
+        last_date.isoformat() if last_date else None,
+    )
+    write_export(entries, fmt, module_keys, text)
+    text.flush()
+    text.detach()
+    return buffer
+
+def import_uploaded_history():
+    """Bulk-loads the uploaded export into the log and drops the caches built from the old history."""
+    uploaded = st.session_state.get('import_file')
+    if uploaded is None:
+        st.session_state.import_message = "Choose a CSV or JSONL file first."
+        return
+    lines = io.TextIOWrapper(uploaded, encoding='utf-8', newline='')
+    try:
+        result = import_entries(get_log_store(), parse_rows(lines, detect_format(uploaded.name), get_catalog().full_sequence_keys))
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Batches written before the unreadable part stay imported, so the caches are dropped either way
+        message = f"Could not read {uploaded.name} ({e}); only the sessions before that point were imported."
+    else:
+        message = f"Imported {result.imported} sessions ({result.skipped} malformed rows skipped)."
+    st.session_state.pop('history_window', None)
+    st.session_state.pop('training_analytics_key', None)
+    get_program_scheduler().clear()
+    get_clinic_roster().clear()
+    st.session_state.import_message = message
 
 def init_state():
     """Initializes or resets the session state variables."""
+    fresh_session = 'view' not in st.session_state
     if 'view' not in st.session_state:
         st.session_state.view = 'home' # Start at the home/onboarding view
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = None # UserRegistry id of the signed-in user
+    if 'user_key' not in st.session_state:
+        st.session_state.user_key = None # Stable user identifier written to the logs
     if 'user_name' not in st.session_state:
         st.session_state.user_name = None
     if 'user_number' not in st.session_state:
@@ -152,285 +201,563 @@ def init_state():
     if 'user_age' not in st.session_state:
         st.session_state.user_age = ''
         
-    if 'selected_options_map' not in st.session_state:
-        # Dictionary to store user's A/B choice for each module: {'plyometrics': 'A', 'lowerStrength': 'B', ...}
-        st.session_state.selected_options_map = {'warmup': 'A'}
-        for key in MAIN_MODULE_KEYS:
-            st.session_state.selected_options_map[key] = 'A' # Default to Option A
-            
-    if 'current_module_index' not in st.session_state:
-        st.session_state.current_module_index = 0
-    if 'current_exercise_index' not in st.session_state:
-        st.session_state.current_exercise_index = 0
-    if 'current_set' not in st.session_state:
-        st.session_state.current_set = 1
-    if 'workout_log' not in st.session_state:
-        st.session_state.workout_log = [] 
+    if 'engine' not in st.session_state:
+        # Headless routine/cursor state machine; the functions below are thin adapters over it
+        st.session_state.engine = WorkoutEngine(get_catalog())
+    else:
+        # Pick up catalog edits for the next plan; a running plan keeps its own copy
+        st.session_state.engine.catalog = get_catalog()
     if 'selected_date' not in st.session_state:
         st.session_state.selected_date = date.today()
 
+    if 'workout_session_id' not in st.session_state:
+        st.session_state.workout_session_id = None # Groups the set events of one routine run
+    if 'last_set_time' not in st.session_state:
+        st.session_state.last_set_time = None # Epoch seconds of the previous set (or routine start)
+
+    if 'rest_seconds' not in st.session_state:
+        st.session_state.rest_seconds = 0 # Optional rest interval after each timed set
+    if 'timer_deadline' not in st.session_state:
+        st.session_state.timer_deadline = None # Epoch seconds at which the running countdown ends
+    if 'timer_phase' not in st.session_state:
+        st.session_state.timer_phase = None # 'work' while holding a timed set, 'rest' between sets
+
+    if 'rerun_count' not in st.session_state:
+        st.session_state.rerun_count = 0
+        st.session_state.fragment_runs = {} # Fragment name -> runs of its body, full-script runs included
+
+    if fresh_session:
+        # A reload or dropped websocket starts a new session; pick up where the token left off
+        restore_resume_token()
+
+def restore_resume_token():
+    """Restores user, date, routine and position from the query-string token, if there is one."""
+    state = decode_resume_token(st.query_params.get(RESUME_PARAM, ""), get_user_registry().resume_key)
+    if state is None:
+        return
+    user = get_user_registry().get(state.user_id)
+    if user is None:
+        return
+    sign_in(user)
+    st.session_state.selected_date = state.workout_date
+
+    engine = st.session_state.engine
+    engine.selected_options_map = get_catalog().routine_options(state.routine_code)
+    view = state.view
+    if view == 'workout':
+        if engine.resume(state.step_cursor):
+            st.session_state.workout_session_id = state.session_id
+            st.session_state.last_set_time = time.time()
+        else:
+            view = 'selection'
+    set_view(view)
+
+def save_resume_token():
+    """Keeps the query-string token in step with the session, so a reload can resume it."""
+    if st.session_state.user_id is None:
+        if RESUME_PARAM in st.query_params:
+            del st.query_params[RESUME_PARAM]
+        return
+    engine = st.session_state.engine
+    view = st.session_state.view
+    if view not in RESUMABLE_VIEWS:
+        view = st.session_state.get('return_view', 'selection')
+    token = encode_resume_token(ResumeState(
+        view=view,
+        workout_date=st.session_state.selected_date,
+        routine_code=get_catalog().routine_code(engine.selected_options_map),
+        step_cursor=engine.step_cursor if view == 'workout' else 0,
+        session_id=st.session_state.workout_session_id if view == 'workout' else None,
+        user_id=st.session_state.user_id,
+    ), get_user_registry().resume_key)
+    if st.query_params.get(RESUME_PARAM) != token:
+        st.query_params[RESUME_PARAM] = token
+
+def count_fragment_run(name: str):
+    """Counts one run of a fragment's body, so tests can tell fragment reruns from full ones."""
+    runs = st.session_state.fragment_runs
+    runs[name] = runs.get(name, 0) + 1
+
 def set_view(view: str):
     """Sets the current application view."""
     st.session_state.view = view
 
+def submit_user_details():
+    """Validates the onboarding form and moves on to planning, all before the next run renders."""
+    name = st.session_state.input_name
+    number = st.session_state.input_number
+    age = st.session_state.input_age
+    if not name:
+        st.session_state.details_error = "Please enter your name to proceed."
+    elif not number.isdigit() or len(number) < 10:
+        st.session_state.details_error = "Please enter a valid contact number."
+    elif not age.isdigit():
+        st.session_state.details_error = "Please enter a valid age."
+    else:
+        try:
+            user = get_user_registry().register(number, name.split()[0], age) # Use first name for greeting
+        except ContactAlreadyRegistered:
+            st.session_state.details_error = "This number is already registered. Please use Welcome Back above."
+            return
+        st.session_state.details_error = None
+        st.session_state.user_number = number
+        sign_in(user)
+        set_view('selection')
+
+def submit_returning_user():
+    """Signs a returning user straight in from their contact number."""
+    number = st.session_state.input_returning_number
+    user = get_user_registry().lookup(number) if number else None
+    if user is None:
+        st.session_state.returning_error = "We don't recognise that number yet. Please fill in your details below."
+        return
+    st.session_state.returning_error = None
+    st.session_state.user_number = number
+    sign_in(user)
+    set_view('selection')
+
+def sign_in(user: UserRecord):
+    """Makes the registered user the owner of this session."""
+    st.session_state.user_id = user.user_id
+    st.session_state.user_key = user.user_key
+    st.session_state.user_name = user.name
+    st.session_state.user_age = user.age
+    apply_scheduled_routine()
+
+def change_workout_date():
+    """Switches to the picked date and loads that day's planned routine."""
+    st.session_state.selected_date = st.session_state.date_picker
+    reset_session_state()
+
+def open_side_view(view: str):
+    """Shows a side page (analytics, program calendar, clinic roster), remembering the main view to return to."""
+    if st.session_state.view in RESUMABLE_VIEWS:
+        st.session_state.return_view = st.session_state.view
+    set_view(view)
+
+def close_side_view():
+    set_view(st.session_state.get('return_view', 'selection'))
+
 def start_workout():
     """Initializes state for the execution of the selected routine."""
     # Ensure options are set before starting
-    for key in MAIN_MODULE_KEYS:
-        if st.session_state.selected_options_map.get(key) is None:
-            st.warning("Please select an option (A or B) for all modules before starting.")
-            return
-
-    st.session_state.current_module_index = 0
-    st.session_state.current_exercise_index = 0
-    st.session_state.current_set = 1
+    if not st.session_state.engine.start():
+        st.warning("Please select an option (A or B) for all modules before starting.")
+        return
+    st.session_state.workout_session_id = uuid.uuid4().hex
+    st.session_state.last_set_time = time.time()
     set_view('workout')
 
+def apply_routine_choices():
+    """Copies the submitted selection form into the engine's option map and the rest interval."""
+    options_map = st.session_state.engine.selected_options_map
+    for key in get_catalog().main_module_keys:
+        options_map[key] = st.session_state.get(f'radio_{key}', options_map.get(key, 'A'))
+    st.session_state.rest_seconds = st.session_state.get('input_rest_seconds', st.session_state.rest_seconds)
+
+def start_selected_workout():
+    apply_routine_choices()
+    start_workout()
+
 def reset_session_state():
     """Resets all relevant state for a fresh workout selection, returning to selection view."""
-    st.session_state.current_module_index = 0
-    st.session_state.current_exercise_index = 0
-    st.session_state.current_set = 1
     # Resetting selections for a new daily plan (but keeping user details)
-    st.session_state.selected_options_map = {'warmup': 'A'} 
-    for key in MAIN_MODULE_KEYS:
-        st.session_state.selected_options_map[key] = 'A'
+    st.session_state.engine.reset()
+    apply_scheduled_routine()
+    # Drop the form's widget values so the radios show the reset defaults
+    for key in get_catalog().main_module_keys:
+        st.session_state.pop(f'radio_{key}', None)
+    clear_set_timer()
     set_view('selection')
 
 def log_workout_completion():
-    """Logs the completed workout to the session state log."""
-    log_entry = {
-        'date': st.session_state.selected_date.isoformat(),
-        'time': datetime.now().strftime("%H:%M:%S"),
-        'routine': st.session_state.selected_options_map.copy(), # Log the specific A/B choices made
-        'user': st.session_state.user_name
-    }
-    st.session_state.workout_log.append(log_entry)
+    """Logs the completed workout to the persistent workout log store."""
+    log_entry = st.session_state.engine.build_log_entry(st.session_state.user_key, st.session_state.selected_date)
+    get_log_store().append(log_entry)
+    get_history_window().insert(log_entry)
+    if st.session_state.get('training_analytics') is not None:
+        st.session_state.training_analytics.append(log_entry)
+    get_program_scheduler().record(st.session_state.user_key, get_catalog(), log_entry)
+    get_clinic_roster().invalidate(st.session_state.user_key)
 
-def get_progression(module_key: str) -> List[Dict[str, Any]]:
+def get_progression(module_key: str) -> Tuple[Exercise, ...]:
     """Retrieves the progression list based on the user's selected option for that module."""
-    option_key = st.session_state.selected_options_map.get(module_key, 'A') # Default safety to 'A'
-    return WORKOUT_DATA[module_key]['options'][option_key]['progression']
+    return st.session_state.engine.get_progression(module_key)
 
 
-def complete_set():
-    """Logic for advancing sets, exercises, and modules in the full custom routine."""
-    current_mod_idx = st.session_state.current_module_index
-    current_ex_idx = st.session_state.current_exercise_index
-    current_mod_key = FULL_SEQUENCE_KEYS[current_mod_idx]
-    
-    progression = get_progression(current_mod_key)
-    current_exercise = progression[current_ex_idx]
+def record_set_event():
+    """Queues an event for the set under the cursor; the write happens off the hot path."""
+    engine = st.session_state.engine
+    step = engine.current_step()
+    now = time.time()
+    get_event_writer().record(SetEvent(
+        session_id=st.session_state.workout_session_id,
+        user=st.session_state.user_key,
+        ts=now,
+        module_key=step.module.key,
+        option_key=step.option.key,
+        exercise_name=step.exercise.name,
+        set_number=step.set_number,
+        step_index=engine.step_cursor,
+        total_steps=engine.routine_plan.total_steps,
+        seconds_since_previous=now - st.session_state.last_set_time,
+    ))
+    st.session_state.last_set_time = now
 
-    # 1. Advance the set
-    if st.session_state.current_set < current_exercise['sets']:
-        st.session_state.current_set += 1
-    
-    # 2. Advance the exercise
-    elif current_ex_idx < len(progression) - 1:
-        st.session_state.current_exercise_index += 1
-        st.session_state.current_set = 1
-    
-    # 3. Advance the module
-    elif current_mod_idx < len(FULL_SEQUENCE_KEYS) - 1:
-        st.session_state.current_module_index += 1
-        st.session_state.current_exercise_index = 0
-        st.session_state.current_set = 1
-    
-    # 4. Finish the entire workout
-    else:
+@instruments.timed('complete_set')
+def complete_set():
+    """Advances the routine by one set, logging and finishing after the last one."""
+    clear_set_timer()
+    record_set_event()
+    if st.session_state.engine.complete_set():
+        # Finish the entire workout
         log_workout_completion()
         set_view('finished')
+        # The button lives in the workout fragment; rerunning the app from the callback replaces
+        # the fragment-scoped run, so finishing costs one full run rather than a fragment run plus one
+        st.rerun()
+
+def is_timed_exercise(exercise: Exercise) -> bool:
+    """True for exercises held for a duration (e.g. 60 s balance holds) rather than counted in reps."""
+    return exercise.time is not None and exercise.unit == "s"
+
+def start_set_timer():
+    """Starts the countdown for the current timed set."""
+    step = st.session_state.engine.current_step()
+    st.session_state.timer_phase = 'work'
+    st.session_state.timer_deadline = time.time() + step.exercise.time
+
+def clear_set_timer():
+    """Stops any running countdown."""
+    st.session_state.timer_phase = None
+    st.session_state.timer_deadline = None
+
+def advance_set_timer():
+    """Moves an expired countdown on: completes the set, then runs the optional rest interval."""
+    if st.session_state.timer_phase == 'work':
+        complete_set()
+        if st.session_state.view == 'workout' and st.session_state.rest_seconds > 0:
+            st.session_state.timer_phase = 'rest'
+            st.session_state.timer_deadline = time.time() + st.session_state.rest_seconds
+    else:
+        # Rest is over; go straight into the next set if it is also timed
+        clear_set_timer()
+        step = st.session_state.engine.current_step()
+        if step is not None and is_timed_exercise(step.exercise):
+            start_set_timer()
 
 
-# --- 3. View Functions ---
+# --- 2. View Functions ---
 
+@instruments.timed('display_home_view')
 def display_home_view():
     """Displays the personalized onboarding and registration screen."""
     st.title("Welcome to Ankle Fitness Flow 🚀")
     st.markdown("Before we start, please tell us a little about yourself to personalize your experience.")
     
+    with st.form("returning_user_form"):
+        st.subheader("Welcome Back")
+        st.text_input("Contact Number", key="input_returning_number", placeholder="The number you registered with")
+
+        if st.session_state.get('returning_error'):
+            st.warning(st.session_state.returning_error)
+
+        st.form_submit_button(
+            "Continue My Routine",
+            key="btn_returning_user",
+            use_container_width=True,
+            on_click=submit_returning_user
+        )
+
     with st.form("user_details_form"):
-        st.subheader("Your Details")
-        
-        name = st.text_input("Full Name", value=st.session_state.user_name if st.session_state.user_name else "", key="input_name")
-        number = st.text_input("Contact Number", value=st.session_state.user_number, key="input_number")
-        age = st.text_input("Age", value=st.session_state.user_age, key="input_age")
+        st.subheader("New Here? Your Details")
         
-        submitted = st.form_submit_button("Start Personalized Routine", type="primary", use_container_width=True)
+        st.text_input("Full Name", value=st.session_state.user_name if st.session_state.user_name else "", key="input_name")
+        st.text_input("Contact Number", value=st.session_state.user_number, key="input_number")
+        st.text_input("Age", value=st.session_state.user_age, key="input_age")
         
-        if submitted:
-            if not name:
-                st.error("Please enter your name to proceed.")
-            elif not number.isdigit() or len(number) < 10:
-                st.error("Please enter a valid contact number.")
-            elif not age.isdigit():
-                st.error("Please enter a valid age.")
-            else:
-                st.session_state.user_name = name.split()[0] # Use first name for greeting
-                st.session_state.user_number = number
-                st.session_state.user_age = age
-                set_view('selection')
-                st.rerun()
+        if st.session_state.get('details_error'):
+            st.error(st.session_state.details_error)
 
+        st.form_submit_button(
+            "Start Personalized Routine",
+            key="btn_submit_details",
+            type="primary",
+            use_container_width=True,
+            on_click=submit_user_details
+        )
+
+@instruments.timed('display_selection_view')
 def display_selection_view():
     """Displays the plan review and module option selection page."""
     
+    options_map = st.session_state.engine.selected_options_map
     user_name = st.session_state.user_name if st.session_state.user_name else "Guest"
     st.title(f"Hello, {user_name}! 👋")
     st.markdown(f"Today's Date: **{st.session_state.selected_date.strftime('%A, %b %d')}**")
+    if st.session_state.user_key is not None:
+        day_plan = get_day_plan(st.session_state.selected_date)
+        day_label = {'planned': "a training day", 'rest': "a rest day", 'missed': "a missed session", 'done': "already done"}
+        st.caption(f"🗓️ Your program: {day_label[day_plan.status]} · {routine_letters(day_plan.routine_code)} is pre-selected below.")
 
     st.subheader("Plan Your Workout: Choose Your Difficulty")
     st.info("Select **Option A** (default) or **Option B** for each module below. Option B usually offers an advanced or different focus.")
     
     # Display Warmup first (it's fixed)
     st.markdown("---")
-    warmup = WORKOUT_DATA['warmup']
-    st.markdown(f"### {warmup['icon']} {warmup['title']} (Fixed)")
+    catalog = get_catalog()
+    warmup = catalog.modules[0]
+    st.markdown(f"### {warmup.icon} {warmup.title} (Fixed)")
     st.caption("Standard mobilization is always included.")
     
-    # Display Selection for Main Modules
-    for key in MAIN_MODULE_KEYS:
-        module = WORKOUT_DATA[key]
-        st.markdown("---")
-        st.markdown(f"### {module['icon']} {module['title']}")
-        
-        col_A, col_B = st.columns(2)
-        
-        with col_A:
-            st.markdown(f"**Option A: {module['options']['A']['title']}**")
-            st.caption(module['options']['A']['description'])
-            
-            # Use radio button for selection
-            if st.radio(
-                "Select Option A", 
-                options=[True, False], 
-                index=0 if st.session_state.selected_options_map.get(key) == 'A' else 1,
-                key=f'radio_{key}_A', 
-                label_visibility="collapsed"
-            ):
-                st.session_state.selected_options_map[key] = 'A'
-                
-        with col_B:
-            st.markdown(f"**Option B: {module['options']['B']['title']}**")
-            st.caption(module['options']['B']['description'])
-
-            if st.radio(
-                "Select Option B", 
-                options=[True, False], 
-                index=0 if st.session_state.selected_options_map.get(key) == 'B' else 1,
-                key=f'radio_{key}_B', 
+    # All choices live in one form, so toggling options costs no reruns; the
+    # plan is applied in a single run when either submit button is pressed
+    metrics_table = get_metrics_table(catalog.version, catalog)
+    with st.form("routine_form", border=False):
+        for bit, key in enumerate(catalog.main_module_keys):
+            module = catalog.module(key)
+            st.markdown("---")
+            st.markdown(f"### {module.icon} {module.title}")
+
+            col_A, col_B = st.columns(2)
+            for col, option_key in ((col_A, 'A'), (col_B, 'B')):
+                with col:
+                    st.markdown(f"**Option {option_key}: {module.option(option_key).title}**")
+                    st.caption(module.option(option_key).description)
+
+            # Label each choice with its load, read from the single-module routines of the table
+            option_loads = {
+                'A': metrics_table[0].module_loads[module.id],
+                'B': metrics_table[1 << bit].module_loads[module.id],
+            }
+            st.radio(
+                f"Option for {module.title}",
+                options=['A', 'B'],
+                index=0 if options_map.get(key, 'A') == 'A' else 1,
+                format_func=lambda o, loads=option_loads: f"Option {o} · {format_module_load(loads[o])}",
+                horizontal=True,
+                key=f'radio_{key}',
                 label_visibility="collapsed"
-            ):
-                st.session_state.selected_options_map[key] = 'B'
-    
-    st.markdown("---")
-    
-    # Summary and Start Button
-    st.subheader("Ready to Go?")
-    st.success("Your plan is set. You will perform 6 total modules in sequence.")
-    
-    # Display final routine summary
-    routine_summary = "Routine: Warmup (A) → " + " → ".join([f"{WORKOUT_DATA[k]['icon']} ({st.session_state.selected_options_map.get(k, 'A')})" for k in MAIN_MODULE_KEYS])
-    st.markdown(f"**{routine_summary}**")
-    
-    st.button(
-        "Start Full Routine",
-        key="btn_start_full_routine",
-        type="primary",
-        use_container_width=True,
-        on_click=start_workout
-    )
+            )
+
+        st.markdown("---")
+        st.subheader("Ready to Go?")
+        st.number_input(
+            "Rest after each timed set (seconds)",
+            min_value=0,
+            max_value=180,
+            step=15,
+            value=st.session_state.rest_seconds,
+            key="input_rest_seconds",
+            help="Timed holds count down and advance on their own; set a rest interval to pause between them."
+        )
+
+        col_update, col_start = st.columns([1, 2])
+        with col_update:
+            st.form_submit_button(
+                "🔄 Update Estimate",
+                key="btn_update_plan",
+                use_container_width=True,
+                on_click=apply_routine_choices
+            )
+        with col_start:
+            st.form_submit_button(
+                "Start Full Routine",
+                key="btn_start_full_routine",
+                type="primary",
+                use_container_width=True,
+                on_click=start_selected_workout
+            )
+
+    # Outside the form: this reflects the last applied choices, not radios toggled since
+    st.markdown("**Last applied plan**")
+    routine_summary = "Routine: Warmup (A) → " + " → ".join([f"{catalog.module(k).icon} ({options_map.get(k, 'A')})" for k in catalog.main_module_keys])
+    st.markdown(routine_summary)
 
+    # Instant lookup into the precomputed table for this exact combination of choices
+    metrics = metrics_table[catalog.routine_code(options_map)]
+    est_minutes = round(metrics.estimated_seconds(st.session_state.rest_seconds) / 60)
+    st.markdown(f"⏱️ **≈ {est_minutes} min, {metrics.set_count} sets** · {metrics.total_reps} total reps "
+                f"over {len(catalog.modules)} modules")
+    st.caption(" · ".join(
+        f"{module.icon} {format_module_load(load)}"
+        for module, load in zip(catalog.modules, metrics.module_loads)
+    ))
+    st.caption("Each option above is labelled with its own load. Press 🔄 Update Estimate to apply changed choices "
+               "here; Start Full Routine always uses the choices shown in the form.")
 
+
+def format_module_load(load: ModuleLoad) -> str:
+    """Short description of a module's volume, e.g. '3 sets, 45 reps'."""
+    return f"{load.sets} sets" + (f", {load.reps} reps" if load.reps else "") + (f", {load.seconds} s" if load.seconds else "")
+
+
+@st.fragment
+@instruments.timed('display_workout_timer')
 def display_workout_timer():
-    """Displays the interactive workout step-tracker for the full custom routine."""
-    
-    current_mod_idx = st.session_state.current_module_index
-    current_ex_idx = st.session_state.current_exercise_index
-    current_set = st.session_state.current_set
+    """Displays the interactive workout step-tracker for the full custom routine.
 
-    if current_mod_idx >= len(FULL_SEQUENCE_KEYS):
+    Runs as a fragment, so "Set Complete" reruns only the workout card; the
+    full page is rerun only when the routine finishes or is abandoned.
+    """
+    count_fragment_run('workout')
+    engine = st.session_state.engine
+    plan = engine.routine_plan
+    cursor = engine.step_cursor
+
+    if plan is None and st.session_state.view == 'workout':
+        set_view('selection')
+    elif plan is not None and cursor >= plan.total_steps and st.session_state.view == 'workout':
         set_view('finished')
-        return
+    if st.session_state.view != 'workout':
+        # Leaving the workout changes the whole page, so hand back to a full app rerun
+        st.rerun()
 
     # Get current exercise details
-    current_mod_key = FULL_SEQUENCE_KEYS[current_mod_idx]
-    current_module = WORKOUT_DATA[current_mod_key]
-    option_key = st.session_state.selected_options_map.get(current_mod_key, 'A')
-    
-    progression = get_progression(current_mod_key)
-    current_exercise = progression[current_ex_idx]
-    
-    max_sets = current_exercise['sets']
-    unit_display = current_exercise.get('reps', current_exercise.get('time'))
-    unit_label = current_exercise['unit']
+    step = plan.step(cursor)
+    current_mod_idx = step.module.id
+    current_module = step.module
+    option_key = step.option.key
+    current_exercise = step.exercise
     
-    # --- Progress Calculation ---
-    total_steps = 0
-    completed_steps = 0
-    
-    for i, mod_key in enumerate(FULL_SEQUENCE_KEYS):
-        opt = st.session_state.selected_options_map.get(mod_key, 'A')
-        mod_prog = WORKOUT_DATA[mod_key]['options'][opt]['progression']
-        
-        for ex in mod_prog:
-            total_steps += ex['sets']
-            
-            if i < current_mod_idx:
-                completed_steps += ex['sets']
-            elif i == current_mod_idx:
-                if ex == current_exercise:
-                    completed_steps += current_set - 1
-                    break
-                else:
-                    completed_steps += ex['sets']
-
-    progress_percentage = (completed_steps / total_steps) if total_steps > 0 else 0
+    progress_percentage = plan.progress(cursor)
 
     st.progress(progress_percentage, text=f"Total Session Progress: {int(progress_percentage * 100)}%")
 
-    st.header(f"Module {current_mod_idx + 1}/{len(FULL_SEQUENCE_KEYS)}: {current_module['icon']} {current_module['title']}")
+    st.header(f"Module {current_mod_idx + 1}/{len(plan.option_ids)}: {current_module.icon} {current_module.title}")
     st.subheader(f"Option {option_key} selected")
 
-    # Current Exercise Display
-    st.markdown(
+    # Current Exercise Display, a dictionary lookup into the pre-rendered cards
+    st.markdown(exercise_card_html(step, plan.catalog_version), unsafe_allow_html=True)
+
+    next_step = plan.next_step(cursor)
+    if next_step is not None:
+        st.caption(f"Up next: {next_step.exercise.name} (Set {next_step.set_number}/{next_step.exercise.sets})")
+    
+    if st.session_state.timer_deadline is not None:
+        display_countdown(st.session_state.timer_deadline - time.time(), st.session_state.timer_phase)
+        watch_set_timer()
+    elif is_timed_exercise(current_exercise):
+        st.button(
+            f"▶️ Start {current_exercise.time}s Timer",
+            key="btn_start_timer",
+            use_container_width=True,
+            on_click=start_set_timer
+        )
+    
+    # Controls
+    st.button(
+        "✅ Set Complete (Advance)", 
+        key="btn_complete_set", 
+        type="primary", 
+        use_container_width=True,
+        on_click=complete_set
+    )
+
+    # Fragment reruns skip the end of main(), so record the new position here
+    save_resume_token()
+
+
+def display_countdown(remaining: float, phase: str):
+    """Renders a client-side countdown, so each tick costs the server nothing."""
+    label = "Rest" if phase == 'rest' else "Hold"
+    # st.iframe supersedes components.html on newer Streamlit releases
+    embed_html = getattr(st, 'iframe', None)
+    if embed_html is None:
+        import streamlit.components.v1 as components
+        embed_html = components.html
+    embed_html(
         f"""
-        <div class="workout-display">
-            <p class="exercise-name">Exercise {current_ex_idx + 1}/{len(progression)}</p>
-            <h2>{current_exercise['name']}</h2>
-            <div class="sets-reps-box">
-                <span class="set-counter">SET {current_set} / {max_sets}</span>
-                <span class="reps-time">🎯 {unit_display} {unit_label}</span>
-            </div>
-            <p class="detail-text">{current_exercise['detail']}</p>
-        </div>
+        <div id="countdown" style="font-family: 'Inter', sans-serif; text-align: center;
+             color: {'#9ca3af' if phase == 'rest' else '#2dd4bf'}; font-size: 2.5rem; font-weight: 800;"></div>
+        <script>
+            const deadline = Date.now() + {max(remaining, 0) * 1000:.0f};
+            const el = document.getElementById("countdown");
+            function tick() {{
+                const left = Math.max(0, Math.ceil((deadline - Date.now()) / 1000));
+                const mm = String(Math.floor(left / 60)).padStart(2, "0");
+                const ss = String(left % 60).padStart(2, "0");
+                el.textContent = left > 0 ? "{label} " + mm + ":" + ss : "{label} done";
+                if (left > 0) setTimeout(tick, 250);
+            }}
+            tick();
+        </script>
         """,
-        unsafe_allow_html=True
+        height=70
     )
+
+
+@st.fragment(run_every=TIMER_CHECK_SECONDS)
+def watch_set_timer():
+    """Checks the running countdown at a coarse interval and advances once it expires."""
+    count_fragment_run('set_timer')
+    deadline = st.session_state.timer_deadline
+    if deadline is not None and time.time() >= deadline:
+        advance_set_timer()
+        # The card and progress changed, so redraw the page
+        st.rerun()
+
+
+@st.fragment
+@instruments.timed('display_workout_history')
+def display_workout_history():
+    """Displays the sidebar workout history; 'Load more' reruns only this fragment."""
+    count_fragment_run('history')
+    st.subheader("Workout History")
     
-    # Controls
-    col_pause, col_complete = st.columns([1, 4])
+    history = get_history_window()
     
-    with col_complete:
-        st.button(
-            "✅ Set Complete (Advance)", 
-            key="btn_complete_set", 
-            type="primary", 
-            use_container_width=True,
-            on_click=complete_set
-        )
+    if history.total:
+        main_module_keys = get_catalog().main_module_keys
+        visible_logs = history.newest(st.session_state.history_visible)
+        st.info(f"Last **{len(visible_logs)}** of **{history.total}** logged sessions:")
+        
+        for log_ts, log in visible_logs:
+            log_date = log_ts.strftime('%b %d')
+            
+            # Show the combination of A/B choices made for the session
+            choices = "/".join(log['routine'].get(k, "-") for k in main_module_keys)
+            
+            st.caption(f"**Custom ({choices})** on {log_date} at {log['time']}")
 
-    with col_pause:
-        st.button(
-            "❌ End Session Early", 
-            key="btn_end_early", 
-            use_container_width=True,
-            on_click=reset_session_state
+        if len(visible_logs) < history.total:
+            st.button("Load more", key="btn_history_more", use_container_width=True, on_click=show_more_history)
+    else:
+        st.info("No workouts logged yet!")
+
+
+def display_history_transfer():
+    """Sidebar export of the user's history; admins can also export everyone's and bulk-import."""
+    with st.expander("📤 Export / Import History"):
+        fmt = st.radio("Format", EXPORT_FORMATS, format_func=str.upper, horizontal=True, key="export_format")
+        date_range = st.date_input("Date range (optional)", value=(), key="export_range")
+        first_date, last_date = (tuple(date_range) + (None, None))[:2]
+        if first_date is not None and last_date is None:
+            last_date = first_date
+        admin = is_admin()
+        all_users = admin and st.checkbox("All users", key="export_all_users")
+        users = None if all_users else [st.session_state.user_key]
+
+        # The file is only built when the button is clicked, not on every rerun
+        store, module_keys = get_log_store(), get_catalog().full_sequence_keys
+        st.download_button(
+            "⬇️ Download",
+            data=lambda: build_export_file(store, module_keys, users, first_date, last_date, fmt),
+            file_name=f"workout_history.{fmt}",
+            mime="text/csv" if fmt == 'csv' else "application/x-ndjson",
+            key="btn_export_history",
+            on_click="ignore",
+            use_container_width=True
         )
-        st.caption("_Returns to planning_")
+
+        if admin:
+            st.file_uploader("Import CSV or JSONL", type=["csv", "jsonl", "ndjson"], key="import_file")
+            st.button("⬆️ Import", key="btn_import_history", use_container_width=True, on_click=import_uploaded_history)
+            if st.session_state.get('import_message'):
+                st.caption(st.session_state.import_message)
 
 
+@instruments.timed('display_finished_view')
 def display_finished_view():
     """Displays the workout completion screen."""
     st.balloons()
@@ -444,99 +771,297 @@ def display_finished_view():
     
     st.button(
         "Plan Another Workout", 
+        key="btn_plan_again",
         type="primary", 
         use_container_width=True, 
         on_click=reset_session_state
     )
 
 
-# --- 4. Streamlit App Layout and Styling ---
+@instruments.timed('display_analytics_view')
+def display_analytics_view():
+    """Displays weekly training load, A-vs-B progression, streaks and adherence."""
+    from workout_analytics import TARGET_SESSIONS_PER_WEEK, week_start
+    st.title("📊 Training Analytics")
+    catalog = get_catalog()
+    analytics = get_training_analytics()
+    summary = analytics.summary()
+
+    if summary.total_sessions == 0:
+        st.info("Complete a workout to start tracking your training load.")
+    else:
+        col_sessions, col_streak, col_longest, col_adherence = st.columns(4)
+        col_sessions.metric("Sessions", summary.total_sessions)
+        col_streak.metric("Current Streak", f"{summary.current_streak} d")
+        col_longest.metric("Longest Streak", f"{summary.longest_streak} d")
+        col_adherence.metric("Adherence (4 wk)", f"{summary.recent_adherence:.0%}")
+        st.caption(
+            f"Adherence is measured against {TARGET_SESSIONS_PER_WEEK} sessions per week; "
+            f"{summary.weeks_on_target:.0%} of weeks since your first session met it."
+        )
+
+        load = analytics.weekly_load()
+        recent = slice(-ANALYTICS_WEEKS, None)
+        weeks = [week_start(int(w)) for w in load.weeks[recent]]
+
+        st.subheader("Weekly Volume")
+        st.markdown("**Reps (sets × reps)**")
+        st.bar_chart(
+            {'Week': weeks, **{m.title: load.reps[recent, m.id] for m in catalog.modules if load.reps[:, m.id].any()}},
+            x='Week'
+        )
+        st.markdown("**Time Under Tension (seconds)**")
+        st.bar_chart(
+            {'Week': weeks, **{m.title: load.seconds[recent, m.id] for m in catalog.modules if load.seconds[:, m.id].any()}},
+            x='Week'
+        )
+
+        st.subheader("Option B Progression")
+        st.caption("Share of each week's sessions that chose the advanced Option B.")
+        st.line_chart(
+            {'Week': weeks, **{
+                catalog.module(key).title: load.b_share[recent, bit] * 100
+                for bit, key in enumerate(catalog.main_module_keys)
+            }},
+            x='Week'
+        )
+
+    st.markdown("---")
+    st.button("⬅️ Back", key="btn_close_analytics", use_container_width=True, on_click=close_side_view)
+
+
+def routine_letters(code: int) -> str:
+    """A routine code as its A/B choices in module order, e.g. 'A/B/A/A/B'."""
+    return "/".join('B' if code >> bit & 1 else 'A' for bit in range(len(get_catalog().main_module_keys)))
+
+
+@instruments.timed('display_program_view')
+def display_program_view():
+    """Displays the multi-week program calendar, planned from the cached schedule."""
+    st.title("🗓️ Program Calendar")
+    rules = get_program_scheduler().rules
+    st.caption(
+        f"Each module moves from Option A to Option B after {rules.promote_after} Option A sessions. "
+        "Upcoming sessions assume you keep to the plan, so later weeks show where you are headed."
+    )
+
+    today = date.today()
+    first = today - timedelta(days=today.weekday() + 7) # Monday of last week
+    plans = get_program_scheduler().plan_range(
+        st.session_state.user_key, get_catalog(), first, date.fromordinal(first.toordinal() + 7 * PROGRAM_WEEKS - 1)
+    )
+    markers = {'done': "✅", 'planned': "🏋️", 'missed': "❌"}
+    weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    st.dataframe(
+        [
+            {'Week of': week[0].day.strftime('%b %d'), **{
+                name: f"{markers[p.status]} {routine_letters(p.routine_code)}" if p.status in ('done', 'planned') else markers.get(p.status, "")
+                for name, p in zip(weekdays, week)
+            }}
+            for week in (plans[i:i + 7] for i in range(0, len(plans), 7))
+        ],
+        hide_index=True
+    )
+    st.caption("✅ done · 🏋️ planned · ❌ missed. Routines list each main module's option in order: "
+               + " → ".join(get_catalog().module(k).icon for k in get_catalog().main_module_keys))
+
+    st.markdown("---")
+    st.button("⬅️ Back", key="btn_close_program", use_container_width=True, on_click=close_side_view)
+
+
+@instruments.timed('display_roster_view')
+def display_roster_view():
+    """Clinician view: every registered patient's latest session, adherence this week and current level."""
+    st.title("🩺 Clinic Roster")
+    catalog = get_catalog()
+    roster = get_clinic_roster()
+    patients = roster.summaries(catalog)
+    st.caption(
+        "Levels are the routine each patient's program plans today, one A/B per main module: "
+        + " → ".join(catalog.module(k).icon for k in catalog.main_module_keys)
+        + f". Summaries refresh when a patient logs a session, or after {roster.ttl_seconds / 60:.0f} min."
+    )
+
+    if not patients:
+        st.info("No patients have registered yet.")
+    else:
+        col_patients, col_active, col_on_target = st.columns(3)
+        col_patients.metric("Patients", len(patients))
+        col_active.metric("Active This Week", sum(1 for _, s in patients if s.week_sessions))
+        col_on_target.metric("On Target", sum(1 for _, s in patients if s.week_adherence >= 1))
+        # Most recently active first; patients who never trained sort last
+        patients.sort(key=lambda p: p[1].last_session or "", reverse=True)
+        st.dataframe(
+            [
+                {
+                    'Patient': f"{user.name} (#{user.user_id})",
+                    'Age': user.age,
+                    'Last Session': summary.last_session or "—",
+                    'Sessions': summary.total_sessions,
+                    'This Week': f"{summary.week_sessions} / {summary.week_target}",
+                    'Adherence': f"{summary.week_adherence:.0%}",
+                    'Level': routine_letters(summary.level_code),
+                }
+                for user, summary in patients
+            ],
+            hide_index=True
+        )
+
+    st.markdown("---")
+    st.button("⬅️ Back", key="btn_close_roster", use_container_width=True, on_click=close_side_view)
+
+
+# --- 3. Streamlit App Layout and Styling ---
 
+APP_CSS = """
+    .stApp {
+        background-color: #1f2937; /* Dark Gray Background */
+        color: #f9fafb; /* Light Text */
+        font-family: 'Inter', sans-serif;
+    }
+    /* Main Content Container */
+    .main .block-container {
+        padding-top: 2rem;
+        padding-bottom: 2rem;
+        max-width: 700px;
+    }
+    h1, h2, h3 {
+        color: #2dd4bf; /* Teal Accent */
+        font-weight: 800;
+    }
+    .stButton>button {
+        border-radius: 0.5rem;
+        transition: all 0.3s ease;
+        font-weight: bold;
+    }
+    .stButton>button:hover {
+        box-shadow: 0 4px 6px -1px rgba(45, 212, 191, 0.4), 0 2px 4px -2px rgba(45, 212, 191, 0.4);
+    }
+
+    /* Radio button adjustment for cleaner look */
+    .stRadio > label {
+        padding-top: 5px;
+    }
+    .stRadio div[role="radiogroup"] {
+        flex-direction: row; /* Make A/B selection horizontal */
+        gap: 15px;
+        margin-top: 10px;
+    }
+
+    /* Workout Display Styling */
+    .workout-display {
+        background-color: #111827;
+        padding: 2rem;
+        border-radius: 1rem;
+        text-align: center;
+        margin-bottom: 1.5rem;
+        border: 2px solid #2dd4bf;
+    }
+    .exercise-name {
+        color: #9ca3af;
+        font-size: 1rem;
+        text-transform: uppercase;
+        margin-bottom: 0.5rem;
+    }
+    .workout-display h2 {
+        color: #f9fafb;
+        font-size: 2.25rem;
+        margin-bottom: 1.5rem;
+    }
+    .sets-reps-box {
+        display: flex;
+        justify-content: center;
+        gap: 2rem;
+        font-weight: bold;
+    }
+    .set-counter {
+        color: #2dd4bf;
+        font-size: 1.5rem;
+    }
+    .reps-time {
+        color: #f9fafb;
+        font-size: 1.5rem;
+    }
+    .detail-text {
+        color: #9ca3af;
+        font-style: italic;
+        margin-top: 1rem;
+    }
+
+"""
+
+@st.cache_resource
+def get_app_css() -> str:
+    """Minifies the stylesheet once per process; every full rerun then resends the same small block."""
+    return f"<style>{minify_css(APP_CSS)}</style>"
+
+
+@instruments.timed('custom_styling')
 def custom_styling():
     """Injects custom CSS for a modern, flowing dark UI/UX."""
-    st.markdown("""
-        <style>
-            .stApp {
-                background-color: #1f2937; /* Dark Gray Background */
-                color: #f9fafb; /* Light Text */
-                font-family: 'Inter', sans-serif;
-            }
-            /* Main Content Container */
-            .main .block-container {
-                padding-top: 2rem;
-                padding-bottom: 2rem;
-                max-width: 700px;
-            }
-            h1, h2, h3 {
-                color: #2dd4bf; /* Teal Accent */
-                font-weight: 800;
-            }
-            .stButton>button {
-                border-radius: 0.5rem;
-                transition: all 0.3s ease;
-                font-weight: bold;
-            }
-            .stButton>button:hover {
-                box-shadow: 0 4px 6px -1px rgba(45, 212, 191, 0.4), 0 2px 4px -2px rgba(45, 212, 191, 0.4);
-            }
-            
-            /* Radio button adjustment for cleaner look */
-            .stRadio > label {
-                padding-top: 5px;
-            }
-            .stRadio div[role="radiogroup"] {
-                flex-direction: row; /* Make A/B selection horizontal */
-                gap: 15px;
-                margin-top: 10px;
-            }
-            /* Styling for the hidden radio button label */
-            .stRadio label[aria-label="Select Option A"], .stRadio label[aria-label="Select Option B"] {
-                margin-top: 5px; 
-            }
-            
-            /* Workout Display Styling */
-            .workout-display {
-                background-color: #111827;
-                padding: 2rem;
-                border-radius: 1rem;
-                text-align: center;
-                margin-bottom: 1.5rem;
-                border: 2px solid #2dd4bf;
-            }
-            .exercise-name {
-                color: #9ca3af;
-                font-size: 1rem;
-                text-transform: uppercase;
-                margin-bottom: 0.5rem;
-            }
-            .workout-display h2 {
-                color: #f9fafb;
-                font-size: 2.25rem;
-                margin-bottom: 1.5rem;
-            }
-            .sets-reps-box {
-                display: flex;
-                justify-content: center;
-                gap: 2rem;
-                font-weight: bold;
-            }
-            .set-counter {
-                color: #2dd4bf;
-                font-size: 1.5rem;
-            }
-            .reps-time {
-                color: #f9fafb;
-                font-size: 1.5rem;
-            }
-            .detail-text {
-                color: #9ca3af;
-                font-style: italic;
-                margin-top: 1rem;
-            }
-        </style>
-    """, unsafe_allow_html=True)
+    # Style-only st.html goes to the event container, so it takes no layout space
+    st.html(get_app_css())
+
+
+def is_admin() -> bool:
+    """True when the ?admin= query parameter carries the admin token."""
+    token = os.environ.get(ADMIN_TOKEN_ENV)
+    if not token:
+        return False
+    # Compare bytes: compare_digest rejects str arguments with non-ASCII characters
+    return hmac.compare_digest(st.query_params.get('admin', '').encode('utf-8'), token.encode('utf-8'))
+
+def session_state_sizes() -> dict:
+    """Approximate bytes held by each session state key, excluding the process-wide shared resources."""
+    shared = (get_catalog(), get_log_store(), get_user_registry(), get_event_writer())
+    return {key: deep_sizeof(value, exclude=shared) for key, value in st.session_state.to_dict().items()}
+
+def record_session_metrics():
+    """Samples this session's state size and refreshes the metrics file, when profiling is on."""
+    if not instruments.enabled:
+        return
+    instruments.observe('session_state_bytes', st.session_state.view, sum(session_state_sizes().values()))
+    instruments.export()
+
+def display_debug_panel():
+    """Admin-only view of the aggregated timings and this session's state size."""
+    with st.expander("🛠️ Debug", expanded=False):
+        snapshot = instruments.snapshot()
+        fragment_runs = ", ".join(f"{n} {name}" for name, n in sorted(st.session_state.fragment_runs.items()))
+        st.caption(
+            f"Up {snapshot['uptime_seconds'] / 60:.0f} min · {st.session_state.rerun_count} reruns this session"
+            + (f" · fragment runs: {fragment_runs}" if fragment_runs else "")
+        )
+        st.dataframe(
+            [
+                {
+                    'Section': m['label'],
+                    'Count': m['count'],
+                    'Mean ms': m['mean'] * 1000,
+                    'p50 ms': m['p50'] * 1000,
+                    'p95 ms': m['p95'] * 1000,
+                    'p99 ms': m['p99'] * 1000,
+                }
+                for m in snapshot['metrics'] if m['metric'] == 'section_seconds'
+            ],
+            hide_index=True
+        )
+        sizes = session_state_sizes()
+        st.markdown(f"**Session state: {sum(sizes.values()) / 1024:.1f} KiB**")
+        st.dataframe(
+            [{'Key': k, 'KiB': v / 1024} for k, v in sorted(sizes.items(), key=lambda kv: -kv[1])],
+            hide_index=True
+        )
+        st.download_button(
+            "Download Prometheus metrics",
+            data=instruments.to_prometheus(),
+            file_name="ankle_fitness_metrics.prom",
+            mime="text/plain",
+            key="btn_download_metrics"
+        )
 
 
+@instruments.timed('main')
 def main():
     """Main function to run the Streamlit application."""
     st.set_page_config(
@@ -548,6 +1073,8 @@ def main():
 
     custom_styling()
     init_state()
+    # Full-script runs this session; each user action should add exactly one
+    st.session_state.rerun_count += 1
     
     # --- Sidebar for Calendar and History ---
     with st.sidebar:
@@ -555,35 +1082,30 @@ def main():
         st.header(f"Hello, {user_name}!")
         
         # Calendar Integration
-        new_date = st.date_input("Select Workout Date", value=st.session_state.selected_date, key="date_picker")
-        if new_date != st.session_state.selected_date:
-            st.session_state.selected_date = new_date
-            # Automatically reset view when date changes to start fresh for that day
-            reset_session_state() 
-            st.rerun()
+        # Changing the date resets the plan in its callback, so the new day renders in one run
+        st.date_input("Select Workout Date", value=st.session_state.selected_date, key="date_picker", on_change=change_workout_date)
 
-        st.markdown("---")
-        st.subheader("Workout History")
-        
-        if st.session_state.workout_log:
-            # Sort all logs by date/time (most recent first)
-            sorted_logs = sorted(
-                st.session_state.workout_log, 
-                key=lambda x: datetime.strptime(x['date'] + x['time'], '%Y-%m-%d%H:%M:%S'), 
-                reverse=True
-            )
-            
-            st.info(f"Last **{len(sorted_logs)}** logged sessions:")
-            
-            for log in sorted_logs:
-                log_date = datetime.fromisoformat(log['date']).strftime('%b %d')
-                
-                # Show the combination of A/B choices made for the session
-                choices = "/".join(log['routine'][k] for k in MAIN_MODULE_KEYS)
-                
-                st.caption(f"**Custom ({choices})** on {log_date} at {log['time']}")
-        else:
-            st.info("No workouts logged yet!")
+        if st.session_state.user_name and st.session_state.view != 'program':
+            st.button("🗓️ Program Calendar", key="btn_open_program", use_container_width=True, on_click=open_side_view, args=('program',))
+        if st.session_state.user_name and st.session_state.view != 'analytics':
+            st.button("📊 Training Analytics", key="btn_open_analytics", use_container_width=True, on_click=open_side_view, args=('analytics',))
+        if is_admin() and st.session_state.view != 'roster':
+            st.button("🩺 Clinic Roster", key="btn_open_roster", use_container_width=True, on_click=open_side_view, args=('roster',))
+
+        # Signed-out visitors see no history: sessions imported without a user are stored under NULL
+        if st.session_state.user_key is not None:
+            st.markdown("---")
+            display_workout_history()
+            st.markdown("---")
+            display_history_transfer()
+
+        catalog_error = get_catalog_reloader().error
+        if catalog_error and is_admin():
+            st.warning(f"The workout catalog edit was rejected; the last valid version is still in use. {catalog_error}")
+
+        if is_admin() and instruments.enabled:
+            st.markdown("---")
+            display_debug_panel()
 
 
     # --- Main Content Renderer ---
@@ -593,8 +1115,25 @@ def main():
         display_selection_view()
     elif st.session_state.view == 'workout':
         display_workout_timer()
+        # Outside the fragment, so abandoning the workout is a single full-app run
+        st.button(
+            "❌ End Session Early",
+            key="btn_end_early",
+            use_container_width=True,
+            on_click=reset_session_state
+        )
+        st.caption("_Returns to planning_")
     elif st.session_state.view == 'finished':
         display_finished_view()
+    elif st.session_state.view == 'analytics':
+        display_analytics_view()
+    elif st.session_state.view == 'program':
+        display_program_view()
+    elif st.session_state.view == 'roster':
+        display_roster_view()
+
+    save_resume_token()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    record_session_metrics()
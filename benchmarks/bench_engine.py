@@ -0,0 +1,95 @@
+"""Throughput benchmark for the headless workout engine.
+
+Pushes simulated "Set Complete" interactions through every one of the 32
+A/B routine combinations and reports the per-interaction cost, so
+regressions in the hot path show up without a Streamlit runtime.
+
+    python benchmarks/bench_engine.py --completions 2000000
+    python benchmarks/bench_engine.py --max-ns 2000   # fail if slower
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workout_catalog import Catalog, load_catalog  # noqa: E402
+from workout_engine import WorkoutEngine  # noqa: E402
+
+
+def all_routines(catalog: Catalog) -> List[Dict[str, str]]:
+    """Returns the option map for each of the 2^5 main-module A/B combinations."""
+    routines = []
+    for choice in itertools.product('AB', repeat=len(catalog.main_module_keys)):
+        options = {catalog.modules[0].key: 'A'}
+        options.update(zip(catalog.main_module_keys, choice))
+        routines.append(options)
+    return routines
+
+
+def run_routine(catalog: Catalog, options: Dict[str, str], completions: int) -> Dict[str, Any]:
+    """Drives one routine for `completions` set completions, restarting it each time it finishes."""
+    engine = WorkoutEngine(catalog)
+    engine.selected_options_map.update(options)
+    engine.start()
+
+    workouts = 0
+    start = time.perf_counter()
+    for _ in range(completions):
+        # Mirror one rerun: resolve the current step, then advance the cursor
+        engine.current_step()
+        engine.routine_plan.progress(engine.step_cursor)
+        if engine.complete_set():
+            workouts += 1
+            engine.start()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'routine': "/".join(options[k] for k in catalog.main_module_keys),
+        'total_steps': engine.routine_plan.total_steps,
+        'completions': completions,
+        'workouts': workouts,
+        'seconds': elapsed,
+        'ns_per_completion': elapsed / completions * 1e9,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--completions', type=int, default=2_000_000,
+                        help="Total set completions, split evenly across all routines.")
+    parser.add_argument('--max-ns', type=float, default=None,
+                        help="Exit non-zero if the mean cost per completion exceeds this many nanoseconds.")
+    parser.add_argument('--json', dest='json_path', default=None,
+                        help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    routines = all_routines(catalog)
+    per_routine = max(args.completions // len(routines), 1)
+
+    results = [run_routine(catalog, options, per_routine) for options in routines]
+    total_seconds = sum(r['seconds'] for r in results)
+    total_completions = sum(r['completions'] for r in results)
+    mean_ns = total_seconds / total_completions * 1e9
+
+    for r in results:
+        print(f"{r['routine']}  steps={r['total_steps']:3d}  {r['ns_per_completion']:8.1f} ns/completion")
+    print(f"\n{total_completions:,} completions over {len(results)} routines in {total_seconds:.2f}s "
+          f"({total_completions / total_seconds:,.0f}/s, {mean_ns:.1f} ns mean)")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'mean_ns_per_completion': mean_ns, 'routines': results}, f, indent=2)
+
+    if args.max_ns is not None and mean_ns > args.max_ns:
+        print(f"FAIL: mean {mean_ns:.1f} ns exceeds budget of {args.max_ns:.1f} ns")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Cold-start benchmark: import time of each module, and a Streamlit worker's first run.
+
+Every measurement runs in a fresh interpreter, so nothing is already cached
+in sys.modules. Headless modules (catalog, engine, storage, CLI) must not
+pull in Streamlit or NumPy; the benchmark fails if one does, or if any
+headless import exceeds its budget.
+
+    python benchmarks/bench_import.py --repeat 7
+    python benchmarks/bench_import.py --max-ms 150 --out import_latency.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules tools and scripts import without the UI; they must stay free of HEAVY_MODULES
+HEADLESS_MODULES = (
+    'workout_catalog',
+    'workout_engine',
+    'routine_metrics',
+    'resume_token',
+    'compact_log',
+    'log_store',
+    'log_transfer',
+    'user_registry',
+    'program_scheduler',
+    'clinic_roster',
+    'workout_cli',
+)
+# Measured for reference only: analytics needs NumPy, the app needs Streamlit
+REFERENCE_MODULES = ('workout_analytics', 'streamlit', 'ankle_fitness_app')
+HEAVY_MODULES = ('streamlit', 'numpy', 'pandas', 'pyarrow', 'tornado')
+
+_IMPORT_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'heavy': sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+_FIRST_RUN_PROBE = """
+import json, os, sys, tempfile, time
+sys.path.insert(0, {root!r})
+os.environ['ANKLE_FITNESS_DB'] = os.path.join(tempfile.mkdtemp(), 'cold.db')
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+elapsed = time.perf_counter() - start
+assert not at.exception, at.exception
+print(json.dumps({{'ms': elapsed * 1000, 'heavy': sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def probe(code: str) -> Dict[str, Any]:
+    """Runs one measurement in a fresh interpreter and returns its JSON result."""
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "probe failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(code: str, repeat: int) -> Dict[str, Any]:
+    runs = [probe(code) for _ in range(repeat)]
+    times: List[float] = [r['ms'] for r in runs]
+    return {
+        'median_ms': statistics.median(times),
+        'max_ms': max(times),
+        'heavy_modules': runs[0]['heavy'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Fresh interpreters per measurement; the median is reported.")
+    parser.add_argument('--max-ms', type=float, default=200.0,
+                        help="Budget for the median import time of each headless module.")
+    parser.add_argument('--skip-first-run', action='store_true',
+                        help="Skip the (slow) measurement of a Streamlit worker's first script run.")
+    parser.add_argument('--out', default=None,
+                        help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {'headless': {}, 'reference': {}}
+    failures = []
+    for module in HEADLESS_MODULES:
+        stats = measure(_IMPORT_PROBE.format(root=ROOT, module=module, heavy=HEAVY_MODULES), args.repeat)
+        results['headless'][module] = stats
+        flags = []
+        if stats['heavy_modules']:
+            flags.append(f"pulls in {', '.join(stats['heavy_modules'])}")
+        if stats['median_ms'] > args.max_ms:
+            flags.append(f"over the {args.max_ms:.0f} ms budget")
+        failures.extend(f"{module} {flag}" for flag in flags)
+        print(f"{module:<20s} median={stats['median_ms']:7.1f}ms  max={stats['max_ms']:7.1f}ms  "
+              f"{'FAIL: ' + '; '.join(flags) if flags else 'ok'}")
+
+    print()
+    for module in REFERENCE_MODULES:
+        stats = measure(_IMPORT_PROBE.format(root=ROOT, module=module, heavy=HEAVY_MODULES), args.repeat)
+        results['reference'][module] = stats
+        print(f"{module:<20s} median={stats['median_ms']:7.1f}ms  max={stats['max_ms']:7.1f}ms  "
+              f"(loads {', '.join(stats['heavy_modules']) or 'nothing heavy'})")
+
+    if not args.skip_first_run:
+        app_path = os.path.join(ROOT, 'ankle_fitness_app.py')
+        stats = measure(_FIRST_RUN_PROBE.format(root=ROOT, app=app_path, heavy=HEAVY_MODULES), args.repeat)
+        results['reference']['app_first_run'] = stats
+        print(f"{'app_first_run':<20s} median={stats['median_ms']:7.1f}ms  max={stats['max_ms']:7.1f}ms  "
+              f"(loads {', '.join(stats['heavy_modules'])})")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if failures:
+        print("\nFAIL:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""Concurrent multi-user load harness for the Streamlit app, using in-process AppTest sessions.
+
+Simulates N users at once, each in its own AppTest session, sharing one set
+of process-wide resources (catalog, SQLite store, user registry, set-event
+writer) just as the sessions of one Streamlit server do. Every user
+registers, plans a random A/B routine, completes it set by set and plans
+again. For each N the harness reports throughput, "Set Complete" response
+time (queueing included) and memory per session.
+
+    python benchmarks/bench_load.py --users 1 4 16 --workouts 2
+    python benchmarks/bench_load.py --users 32 --think-ms 500 --out load.json
+    python benchmarks/bench_load.py --users 32 --processes 4   # four server replicas
+
+AppTest swaps a process-global runtime on every run, so sessions cannot run
+on parallel threads. Instead one scheduler thread serves the users' reruns
+first come, first served, which is how a single server process behaves once
+the GIL is saturated: a user's response time is the rerun itself plus the
+wait behind other users' reruns. With --processes, users are split across a
+process pool of independent "servers" sharing the same SQLite database.
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from bench_reruns import APP_PATH, CATALOG, percentile  # noqa: E402
+from instrumentation import deep_sizeof  # noqa: E402
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process; falls back to the peak where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def session_state_bytes(at: AppTest) -> int:
+    """Approximate bytes held by one session's state, not counting the shared resources."""
+    state = at.session_state.to_dict()
+    engine = state.get('engine')
+    window = state.get('history_window')
+    shared = [x for x in (getattr(engine, 'catalog', None), getattr(window, 'store', None)) if x is not None]
+    return deep_sizeof(state, exclude=shared)
+
+
+class SimulatedUser:
+    """One clinic patient driving the app through full workouts."""
+
+    def __init__(self, index: int, workouts: int, think_seconds: float):
+        self.index = index
+        self.workouts = workouts
+        self.think_seconds = think_seconds
+        self.rng = random.Random(index)
+        self.at = AppTest.from_file(APP_PATH, default_timeout=120)
+        self.sets_completed = 0
+
+    def think(self) -> float:
+        """Seconds until the user's next action."""
+        return self.rng.uniform(0.5, 1.5) * self.think_seconds if self.think_seconds else 0.0
+
+    def flow(self) -> Iterator[str]:
+        """Stages each action's widget input, then yields its name for the scheduler to run."""
+        at = self.at
+        yield 'home'
+        at.text_input(key="input_name").input(f"Patient {self.index}")
+        at.text_input(key="input_number").input(f"07{self.index:08d}")
+        at.text_input(key="input_age").input(str(20 + self.index % 60))
+        at.button(key="btn_submit_details").click()
+        yield 'register'
+
+        for _ in range(self.workouts):
+            for key in CATALOG.main_module_keys:
+                at.radio(key=f'radio_{key}').set_value(self.rng.choice('AB'))
+            at.button(key="btn_start_full_routine").click()
+            yield 'start'
+            while at.session_state.view == 'workout':
+                at.button(key="btn_complete_set").click()
+                yield 'set_complete'
+                self.sets_completed += 1
+            at.button(key="btn_plan_again").click()
+            yield 'plan_again'
+
+
+def serve(users: List[SimulatedUser]) -> Dict[str, List[float]]:
+    """Runs every user's flow to the end, one rerun at a time in arrival order.
+
+    Returns response times per action: from the moment the user acted to
+    the end of their rerun, so time spent queued behind others counts.
+    """
+    samples: Dict[str, List[float]] = defaultdict(list)
+    flows = [u.flow() for u in users]
+    origin = time.perf_counter()
+    # (ready time, user index): when each user next wants the server
+    queue = [(users[i].think(), i) for i in range(len(users))]
+    heapq.heapify(queue)
+    while queue:
+        ready_at, i = heapq.heappop(queue)
+        action = next(flows[i], None)
+        if action is None:
+            continue
+        now = time.perf_counter() - origin
+        if ready_at > now:
+            # Everyone is thinking; the server idles until the next action arrives
+            time.sleep(ready_at - now)
+        users[i].at.run()
+        if users[i].at.exception:
+            raise RuntimeError(users[i].at.exception[0].value)
+        finished = time.perf_counter() - origin
+        samples[action].append(finished - ready_at)
+        heapq.heappush(queue, (finished + users[i].think(), i))
+    return samples
+
+
+def run_shard(db_path: str, first_index: int, count: int, workouts: int, think_seconds: float) -> Dict[str, Any]:
+    """Serves `count` users in this process; one shard is one simulated server."""
+    os.environ['ANKLE_FITNESS_DB'] = db_path
+    # Fresh shared resources for this level
+    st.cache_resource.clear()
+    # Warm up imports, caches and the script cache so the first level isn't charged for them
+    AppTest.from_file(APP_PATH, default_timeout=120).run()
+    rss_before = current_rss_bytes()
+    users = [SimulatedUser(first_index + i, workouts, think_seconds) for i in range(count)]
+    samples = serve(users)
+    # Sessions are still alive here, as they would be on a server
+    return {
+        'samples': dict(samples),
+        'sets': sum(u.sets_completed for u in users),
+        'rss_bytes': max(current_rss_bytes() - rss_before, 0),
+        'state_bytes': sum(session_state_bytes(u.at) for u in users),
+    }
+
+
+def run_level(db_path: str, users: int, processes: int, workouts: int, think_seconds: float) -> Dict[str, Any]:
+    """Runs `users` simulated users concurrently, split over `processes` servers, and summarizes the level."""
+    processes = min(processes, users)
+    shards = [(db_path, p * users // processes, (p + 1) * users // processes - p * users // processes,
+               workouts, think_seconds) for p in range(processes)]
+
+    start = time.perf_counter()
+    if processes == 1:
+        results = [run_shard(*shards[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(run_shard, *zip(*shards)))
+    elapsed = time.perf_counter() - start
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for result in results:
+        for action, times in result['samples'].items():
+            samples[action].extend(times)
+    sets = sum(r['sets'] for r in results)
+    reruns = sum(len(times) for times in samples.values())
+    set_times = samples['set_complete']
+
+    return {
+        'users': users,
+        'processes': processes,
+        'seconds': elapsed,
+        'reruns_per_second': reruns / elapsed,
+        'sets_per_second': sets / elapsed,
+        'workouts_per_minute': users * workouts / elapsed * 60,
+        'set_complete_ms': {
+            'p50': percentile(set_times, 50) * 1000,
+            'p95': percentile(set_times, 95) * 1000,
+            'p99': percentile(set_times, 99) * 1000,
+            'max': max(set_times) * 1000,
+        },
+        'actions_p95_ms': {action: percentile(times, 95) * 1000 for action, times in samples.items()},
+        'rss_per_session_kib': sum(r['rss_bytes'] for r in results) / users / 1024,
+        'state_per_session_kib': sum(r['state_bytes'] for r in results) / users / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+                        help="Concurrent user counts to scale through.")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="Server processes to split the users across (1 = a single Streamlit process).")
+    parser.add_argument('--workouts', type=int, default=1,
+                        help="Full workouts each simulated user completes.")
+    parser.add_argument('--think-ms', type=float, default=0.0,
+                        help="Mean pause before each action, in milliseconds (0 = back-to-back).")
+    parser.add_argument('--out', default='load_latency.json',
+                        help="Where to write the JSON results.")
+    args = parser.parse_args()
+
+    levels = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for users in args.users:
+            # A fresh database per level
+            db_path = os.path.join(tmp, f'load_{users}.db')
+            level = run_level(db_path, users, args.processes, args.workouts, args.think_ms / 1000)
+            levels.append(level)
+            lat = level['set_complete_ms']
+            print(f"users={users:<4d} {level['sets_per_second']:8.1f} sets/s  "
+                  f"{level['workouts_per_minute']:7.1f} workouts/min  "
+                  f"set p50={lat['p50']:7.2f}ms p95={lat['p95']:7.2f}ms p99={lat['p99']:7.2f}ms  "
+                  f"rss/session={level['rss_per_session_kib']:8.1f}KiB  state/session={level['state_per_session_kib']:6.1f}KiB")
+
+    with open(args.out, 'w') as f:
+        json.dump({'workouts': args.workouts, 'think_ms': args.think_ms, 'processes': args.processes,
+                   'levels': levels}, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
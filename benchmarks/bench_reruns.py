@@ -0,0 +1,143 @@
+"""Rerun latency benchmark for the Streamlit app, using the in-process AppTest.
+
+Drives ankle_fitness_app.py through the real user flows (onboarding form,
+date picker, batched A/B selection form, "Set Complete" until finished) against workout
+logs of several sizes, and reports p50/p95/p99 full-script rerun time per
+view and per history size.
+
+    python benchmarks/bench_reruns.py --history 0 1000 10000 --rounds 3
+    python benchmarks/bench_reruns.py --out rerun_latency.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from log_store import SQLiteLogStore  # noqa: E402
+from user_registry import UserRegistry  # noqa: E402
+from workout_catalog import load_catalog  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, 'ankle_fitness_app.py')
+BENCH_USER = "Bench User"
+BENCH_NUMBER = "0123456789"
+CATALOG = load_catalog()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sample list."""
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def seed_history(path: str, size: int):
+    """Fills a fresh log database with `size` past sessions for the benchmark user."""
+    store = SQLiteLogStore(path)
+    rng = random.Random(size)
+    user = UserRegistry(store.pool).register(BENCH_NUMBER, BENCH_USER.split()[0], "30")
+    store.extend(
+        {
+            'date': (date.today() - timedelta(days=i // 2)).isoformat(),
+            'time': f"{8 + i % 12:02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}",
+            'routine': {k: ('A' if pos == 0 else rng.choice('AB')) for pos, k in enumerate(CATALOG.full_sequence_keys)},
+            'user': user.user_key,
+        }
+        for i in range(size)
+    )
+    store.close()
+
+
+def timed_run(at: AppTest, samples: Dict[str, List[float]]):
+    """Runs the script once and files the wall time under the view it rendered."""
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    samples[at.session_state.view].append(elapsed)
+
+
+def run_flow(samples: Dict[str, List[float]], rng: random.Random):
+    """One full user journey: home -> selection -> workout -> finished."""
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    timed_run(at, samples)
+
+    # The seeded user signs back in with their contact number
+    at.text_input(key="input_returning_number").input(BENCH_NUMBER)
+    at.button(key="btn_returning_user").click()
+    timed_run(at, samples)
+
+    # Date picker change resets the plan for the new day
+    at.date_input(key="date_picker").set_value(date.today() - timedelta(days=1))
+    timed_run(at, samples)
+
+    # Choices sit in one form, so they cost no reruns until it is submitted
+    for key in CATALOG.main_module_keys:
+        at.radio(key=f'radio_{key}').set_value(rng.choice('AB'))
+    at.button(key="btn_start_full_routine").click()
+    timed_run(at, samples)
+    while at.session_state.view == 'workout':
+        at.button(key="btn_complete_set").click()
+        timed_run(at, samples)
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        view: {
+            'runs': len(times),
+            'p50_ms': percentile(times, 50) * 1000,
+            'p95_ms': percentile(times, 95) * 1000,
+            'p99_ms': percentile(times, 99) * 1000,
+        }
+        for view, times in samples.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history', type=int, nargs='+', default=[0, 1000, 10000],
+                        help="Workout log sizes to benchmark against.")
+    parser.add_argument('--rounds', type=int, default=3,
+                        help="Full user journeys per history size.")
+    parser.add_argument('--out', default='rerun_latency.json',
+                        help="Where to write the JSON results.")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {'rounds': args.rounds, 'history': {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.history:
+            db_path = os.path.join(tmp, f'history_{size}.db')
+            seed_history(db_path, size)
+            os.environ['ANKLE_FITNESS_DB'] = db_path
+            # Drop the shared store so the app reconnects to this history size
+            st.cache_resource.clear()
+
+            samples: Dict[str, List[float]] = defaultdict(list)
+            rng = random.Random(0)
+            for _ in range(args.rounds):
+                run_flow(samples, rng)
+            results['history'][str(size)] = summarize(samples)
+
+            for view, stats in results['history'][str(size)].items():
+                print(f"history={size:<7d} {view:<10s} runs={stats['runs']:4d}  "
+                      f"p50={stats['p50_ms']:7.2f}ms  p95={stats['p95_ms']:7.2f}ms  p99={stats['p99_ms']:7.2f}ms")
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Load-time benchmark for the clinician roster, without a Streamlit runtime.
+
+Seeds a fresh database with registered patients and months of sessions,
+then times a cold roster (every summary computed, at each worker count),
+a warm roster (all cached) and the refresh after one patient logs a session.
+
+    python benchmarks/bench_roster.py --patients 300 --weeks 26
+    python benchmarks/bench_roster.py --workers 1 4 8 --max-ms 1000   # fail if a cold load is slower
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clinic_roster import ClinicRoster  # noqa: E402
+from log_store import SQLiteLogStore  # noqa: E402
+from program_scheduler import ProgramScheduler  # noqa: E402
+from user_registry import UserRegistry  # noqa: E402
+from workout_catalog import load_catalog  # noqa: E402
+
+CATALOG = load_catalog()
+
+
+def seed_roster(store: SQLiteLogStore, registry: UserRegistry, patients: int, weeks: int):
+    """Registers `patients` users, each with up to three sessions a week over the last `weeks` weeks."""
+    rng = random.Random(patients)
+    today = date.today()
+    entries = []
+    for i in range(patients):
+        user = registry.register(f"07{i:08d}", f"Patient{i}", str(20 + i % 60))
+        for day in range(weeks * 7):
+            if rng.random() < 3 / 7:
+                entries.append({
+                    'date': (today - timedelta(days=day)).isoformat(),
+                    'time': f"{8 + rng.randrange(12):02d}:{rng.randrange(60):02d}:00",
+                    'routine': {k: ('A' if pos == 0 else rng.choice('AB')) for pos, k in enumerate(CATALOG.full_sequence_keys)},
+                    'user': user.user_key,
+                })
+    store.extend(entries)
+    return len(entries)
+
+
+def time_load(roster: ClinicRoster) -> float:
+    start = time.perf_counter()
+    roster.summaries(CATALOG)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=300,
+                        help="Registered patients on the roster.")
+    parser.add_argument('--weeks', type=int, default=26,
+                        help="Weeks of history seeded per patient.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4],
+                        help="Thread pool sizes to time the cold load with.")
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help="Fail if a cold load with the largest worker count exceeds this many milliseconds.")
+    parser.add_argument('--out', default=None,
+                        help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    results = {'patients': args.patients, 'weeks': args.weeks, 'cold_ms': {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteLogStore(os.path.join(tmp, 'roster.db'), pool_size=max(args.workers))
+        registry = UserRegistry(store.pool)
+        results['sessions'] = seed_roster(store, registry, args.patients, args.weeks)
+        print(f"Seeded {args.patients} patients with {results['sessions']:,} sessions")
+
+        for workers in args.workers:
+            # A fresh scheduler and roster, so neither programs nor summaries are cached
+            roster = ClinicRoster(store, registry, ProgramScheduler(store), workers=workers)
+            results['cold_ms'][workers] = time_load(roster) * 1000
+            print(f"cold  workers={workers:<3d} {results['cold_ms'][workers]:8.1f} ms")
+
+        results['warm_ms'] = time_load(roster) * 1000
+        print(f"warm              {results['warm_ms']:8.1f} ms")
+
+        user = registry.all_users()[0]
+        entry = {'date': date.today().isoformat(), 'time': "23:59:00",
+                 'routine': CATALOG.routine_options(0), 'user': user.user_key}
+        store.append(entry)
+        roster.scheduler.record(user.user_key, CATALOG, entry)
+        roster.invalidate(user.user_key)
+        results['after_log_ms'] = time_load(roster) * 1000
+        print(f"after one session {results['after_log_ms']:8.1f} ms")
+        store.close()
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    cold = results['cold_ms'][max(args.workers)]
+    if args.max_ms is not None and cold > args.max_ms:
+        print(f"FAIL: cold load {cold:.1f} ms exceeds budget of {args.max_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from log_store import WorkoutLogStore
+from program_scheduler import ProgramScheduler
+from user_registry import UserRecord, UserRegistry
+from workout_catalog import Catalog
+
+
+class PatientSummary(NamedTuple):
+    """One patient's row on the clinic roster, derived from their workout log."""
+    total_sessions: int
+    last_session: Optional[str] # 'YYYY-MM-DD HH:MM:SS' of the most recent session, if any
+    week_sessions: int # Sessions logged since Monday
+    week_target: int # Training days per week the program prescribes
+    level_code: int # Catalog.routine_code the program plans today: each main module's current A/B level
+
+    @property
+    def week_adherence(self) -> float:
+        return min(self.week_sessions / self.week_target, 1.0) if self.week_target else 0.0
+
+
+class ClinicRoster:
+    """Per-patient summaries for the clinician view, computed in parallel and cached.
+
+    A summary is computed on a worker thread (the SQLite pool serves the
+    queries concurrently) and cached per patient until it is older than
+    `ttl_seconds`, the day rolls over, the catalog changes or the patient
+    logs a session. `invalidate` only reaches this process; sessions logged
+    through another server process show up once the TTL expires.
+    """
+
+    def __init__(self, store: WorkoutLogStore, registry: UserRegistry, scheduler: ProgramScheduler,
+                 ttl_seconds: float = 300.0, workers: int = 4):
+        self.store = store
+        self.registry = registry
+        self.scheduler = scheduler
+        self.ttl_seconds = ttl_seconds
+        self.workers = workers
+        # user key -> (expiry on the monotonic clock, today ordinal, catalog version, summary)
+        self._cache: Dict[str, Tuple[float, int, str, PatientSummary]] = {}
+        self._lock = threading.Lock()
+
+    def summarize(self, user: str, catalog: Catalog, today: date) -> PatientSummary:
+        """Computes one patient's summary straight from the log, bypassing the cache."""
+        latest = self.store.recent(user, 1)
+        monday = today - timedelta(days=today.weekday())
+        week_sessions = sum(1 for _ in self.store.iter_range([user], monday.isoformat(), today.isoformat()))
+        return PatientSummary(
+            total_sessions=self.store.count(user),
+            last_session=f"{latest[0]['date']} {latest[0]['time']}" if latest else None,
+            week_sessions=week_sessions,
+            week_target=len(self.scheduler.rules.training_weekdays),
+            level_code=self.scheduler.plan_for(user, catalog, today, today).routine_code,
+        )
+
+    def _cached(self, user: str, catalog: Catalog, today: int, now: float) -> Optional[PatientSummary]:
+        entry = self._cache.get(user)
+        if entry is None:
+            return None
+        expires_at, day, version, summary = entry
+        return summary if now < expires_at and day == today and version == catalog.version else None
+
+    def summaries(self, catalog: Catalog, today: Optional[date] = None) -> List[Tuple[UserRecord, PatientSummary]]:
+        """Every registered patient with their summary, recomputing only missing or stale ones in parallel."""
+        today = today or date.today()
+        now = time.monotonic()
+        users = self.registry.all_users()
+        with self._lock:
+            found = {u.user_key: self._cached(u.user_key, catalog, today.toordinal(), now) for u in users}
+        stale = [key for key, summary in found.items() if summary is None]
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                fresh = pool.map(lambda key: self.summarize(key, catalog, today), stale)
+                found.update(zip(stale, fresh))
+            expires_at = time.monotonic() + self.ttl_seconds
+            with self._lock:
+                for key in stale:
+                    self._cache[key] = (expires_at, today.toordinal(), catalog.version, found[key])
+        return [(u, found[u.user_key]) for u in users]
+
+    def invalidate(self, user: Optional[str]):
+        """Drops a patient's cached summary, e.g. when they log a session."""
+        with self._lock:
+            self._cache.pop(user, None)
+
+    def clear(self):
+        """Drops every cached summary, e.g. after a bulk import rewrote history."""
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,116 @@
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+# Log timestamps are naive local wall-clock times; they are packed as seconds
+# since this naive epoch, so no timezone conversion can alter them.
+EPOCH = datetime(1970, 1, 1)
+
+
+def encode_timestamp(date_str: str, time_str: str) -> int:
+    """Packs a log entry's 'YYYY-MM-DD' date and 'HH:MM:SS' time into epoch seconds."""
+    return int((datetime.fromisoformat(f"{date_str}T{time_str}") - EPOCH).total_seconds())
+
+
+def decode_timestamp(ts: int) -> datetime:
+    return EPOCH + timedelta(seconds=ts)
+
+
+class CompactLog:
+    """Workout log entries held as parallel typed arrays, about 14 bytes per entry.
+
+    Each entry becomes an epoch-second timestamp, its A/B routine packed into
+    two small integers (bit i of `routines` set when module i of `module_keys`
+    chose B, bit i of `recorded` set when the entry has a choice for module i
+    at all), and an interned user id. Modules missing from an entry stay
+    missing when it is expanded again; choices for modules outside the layout,
+    e.g. from an import or a module since removed from the catalog, are dropped.
+    """
+
+    def __init__(self, module_keys: Sequence[str]):
+        self.module_keys: Tuple[str, ...] = tuple(module_keys)
+        self._bit_index = {key: bit for bit, key in enumerate(self.module_keys)}
+        self.timestamps = array('q')
+        self.routines = array('B' if len(self.module_keys) <= 8 else 'I')
+        self.recorded = array(self.routines.typecode)
+        self.user_ids = array('I')
+        # Interned user names; id 0 is reserved for entries logged without a user
+        self.users: List[Optional[str]] = [None]
+        self._user_ids: Dict[Optional[str], int] = {None: 0}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays (the interned user table is shared by all rows)."""
+        return sum(col.itemsize * len(col) for col in self._columns)
+
+    @property
+    def _columns(self) -> Tuple[array, ...]:
+        return self.timestamps, self.routines, self.recorded, self.user_ids
+
+    def intern_user(self, user: Optional[str]) -> int:
+        user_id = self._user_ids.get(user)
+        if user_id is None:
+            user_id = len(self.users)
+            self.users.append(user)
+            self._user_ids[user] = user_id
+        return user_id
+
+    def encode_routine(self, routine: Mapping[str, str]) -> Tuple[int, int]:
+        """Packs a routine into (B choices, recorded modules) bitmasks, skipping keys outside the layout."""
+        code = recorded = 0
+        for key, option in routine.items():
+            bit = self._bit_index.get(key)
+            if bit is None or option not in ('A', 'B'):
+                continue
+            recorded |= 1 << bit
+            if option == 'B':
+                code |= 1 << bit
+        return code, recorded
+
+    def decode_routine(self, code: int, recorded: int) -> Dict[str, str]:
+        return {
+            key: 'B' if code >> bit & 1 else 'A'
+            for bit, key in enumerate(self.module_keys) if recorded >> bit & 1
+        }
+
+    def encode(self, entry: Mapping[str, Any]) -> Tuple[int, int, int, int]:
+        """Packs one log dict into its (timestamp, routine, recorded, user_id) row."""
+        return (
+            encode_timestamp(entry['date'], entry['time']),
+            *self.encode_routine(entry['routine']),
+            self.intern_user(entry['user']),
+        )
+
+    def append(self, entry: Mapping[str, Any]):
+        self.insert(len(self), entry)
+
+    def extend(self, entries: Iterable[Mapping[str, Any]]):
+        for entry in entries:
+            self.append(entry)
+
+    def insert(self, index: int, entry: Mapping[str, Any]):
+        for col, value in zip(self._columns, self.encode(entry)):
+            col.insert(index, value)
+
+    def prepend(self, entries: Sequence[Mapping[str, Any]]):
+        """Inserts a batch of entries, in order, before all existing rows."""
+        rows = [self.encode(e) for e in entries]
+        for i, col in enumerate(self._columns):
+            col[:0] = array(col.typecode, (r[i] for r in rows))
+
+    def entry(self, index: int) -> Dict[str, Any]:
+        """Expands one row back into the log dict shape."""
+        stamp = decode_timestamp(self.timestamps[index])
+        return {
+            'date': stamp.date().isoformat(),
+            'time': stamp.strftime("%H:%M:%S"),
+            'routine': self.decode_routine(self.routines[index], self.recorded[index]),
+            'user': self.users[self.user_ids[index]],
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.entry(i)
@@ -0,0 +1,201 @@
+import bisect
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# Set to 1 to turn instrumentation on; it is off by default and then costs nothing
+PROFILE_ENV = 'ANKLE_FITNESS_PROFILE'
+# Where to write the aggregated metrics; a .json path gets JSON, anything else Prometheus text
+METRICS_FILE_ENV = 'ANKLE_FITNESS_METRICS_FILE'
+# Secret that opens the debug panel when passed as the ?admin= query parameter
+ADMIN_TOKEN_ENV = 'ANKLE_FITNESS_ADMIN_TOKEN'
+
+# Histogram upper bounds: rerun sections in seconds, session state in bytes
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BYTES_BUCKETS = (1_000, 4_000, 16_000, 64_000, 256_000, 1_000_000, 4_000_000, 16_000_000)
+
+_METRIC_PREFIX = 'ankle_fitness'
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV, '').lower() in ('1', 'true', 'yes')
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by linear interpolation within its bucket, like histogram_quantile()."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class Instrumentation:
+    """Process-wide timers and histograms for the hot paths of the app.
+
+    Sections are timed with the `timed` decorator or the `timer` context
+    manager and aggregated per name. When disabled, `timed` hands back the
+    undecorated function and `timer` a shared no-op context, so leaving the
+    hooks in place costs nothing.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        # (metric, label) -> histogram; metric is 'section_seconds' or 'session_state_bytes'
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._last_export = 0.0
+
+    def observe(self, metric: str, label: str, value: float):
+        with self._lock:
+            hist = self._histograms.get((metric, label))
+            if hist is None:
+                hist = Histogram(BYTES_BUCKETS if metric.endswith('_bytes') else SECONDS_BUCKETS)
+                self._histograms[(metric, label)] = hist
+            hist.observe(value)
+
+    @contextmanager
+    def _timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('section_seconds', name, time.perf_counter() - start)
+
+    def timer(self, name: str):
+        """Context manager timing the enclosed block as section `name`."""
+        return self._timer(name) if self.enabled else nullcontext()
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorator timing every call of the function as section `name`."""
+        def decorate(fn: Callable) -> Callable:
+            if not self.enabled:
+                return fn
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self._timer(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def histograms(self) -> Dict[Tuple[str, str], Histogram]:
+        with self._lock:
+            return dict(self._histograms)
+
+    # --- Export ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary of every histogram, as served to the debug panel and the JSON export."""
+        return {
+            'uptime_seconds': time.time() - self.started_at,
+            'metrics': [
+                {
+                    'metric': metric,
+                    'label': label,
+                    'count': hist.count,
+                    'sum': hist.sum,
+                    'mean': hist.sum / hist.count if hist.count else math.nan,
+                    'p50': hist.quantile(0.5),
+                    'p95': hist.quantile(0.95),
+                    'p99': hist.quantile(0.99),
+                }
+                for (metric, label), hist in sorted(self.histograms().items())
+            ],
+        }
+
+    def to_prometheus(self) -> str:
+        """Renders every histogram in the Prometheus text exposition format."""
+        lines = []
+        families: Dict[str, list] = {}
+        for (metric, label), hist in sorted(self.histograms().items()):
+            families.setdefault(metric, []).append((label, hist))
+        for metric, series in families.items():
+            name = f"{_METRIC_PREFIX}_{metric}"
+            label_name = 'section' if metric == 'section_seconds' else 'view'
+            lines.append(f"# TYPE {name} histogram")
+            for label, hist in series:
+                cumulative = 0
+                for bound, n in zip(hist.buckets + (math.inf,), hist.counts):
+                    cumulative += n
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f'{name}_bucket{{{label_name}="{label}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label_name}="{label}"}} {hist.sum!r}')
+                lines.append(f'{name}_count{{{label_name}="{label}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Optional[str] = None, min_interval: float = 10.0) -> bool:
+        """Writes the metrics file at most every `min_interval` seconds; returns True if it wrote."""
+        path = path or os.environ.get(METRICS_FILE_ENV)
+        now = time.time()
+        if not self.enabled or not path or now - self._last_export < min_interval:
+            return False
+        self._last_export = now
+        body = json.dumps(self.snapshot(), indent=2) if path.endswith('.json') else self.to_prometheus()
+        # Write then rename, so a scraper never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        return True
+
+
+def deep_sizeof(obj: Any, exclude: Iterable[Any] = ()) -> int:
+    """Approximate memory held by an object graph, not descending into the `exclude` objects.
+
+    Used to size a session's state; shared resources (the log store, the
+    catalog) are excluded so they are not charged to every session.
+    """
+    seen = {id(x) for x in exclude}
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current, 0)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif not isinstance(current, (str, bytes, bytearray, int, float, type)) and not callable(current):
+            if hasattr(current, '__dict__'):
+                stack.append(vars(current))
+            for slot in getattr(type(current), '__slots__', ()):
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+    return total
+
+
+# Shared by every session of the server process
+instruments = Instrumentation(profiling_enabled())
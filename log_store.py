@@ -0,0 +1,297 @@
+import bisect
+import json
+import os
+import queue
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from compact_log import CompactLog, decode_timestamp, encode_timestamp
+
+# Default on-disk location of the workout log; override with ANKLE_FITNESS_DB
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workout_log.db')
+
+
+def default_db_path() -> str:
+    """Resolves the workout log location, honouring ANKLE_FITNESS_DB at call time."""
+    return os.environ.get('ANKLE_FITNESS_DB', DEFAULT_DB_PATH)
+
+
+# --- 1. Backend Interface ---
+
+class SetEvent(NamedTuple):
+    """One completed set, recorded as it happens so partial sessions leave a trace."""
+    session_id: str # Identifies one run through a routine, from start to finish or abandonment
+    user: Optional[str]
+    ts: float # Epoch seconds at which the set was completed
+    module_key: str
+    option_key: str
+    exercise_name: str
+    set_number: int
+    step_index: int # Cursor position of the set within the routine plan
+    total_steps: int
+    seconds_since_previous: float # Since the previous set, or since the routine started
+
+class WorkoutLogStore(ABC):
+    """Pluggable storage backend for completed workout log entries.
+
+    Entries use the same shape the app has always logged:
+    {'date': 'YYYY-MM-DD', 'time': 'HH:MM:SS', 'routine': {module_key: 'A'|'B'}, 'user': str}
+    """
+
+    @abstractmethod
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Persists a single workout log entry."""
+
+    def extend(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Persists many entries; backends override this with a batched write."""
+        for entry in entries:
+            self.append(entry)
+
+    @abstractmethod
+    def recent(self, user: Optional[str], limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        """Returns at most `limit` entries for the user, most recent first, skipping `offset`."""
+
+    @abstractmethod
+    def count(self, user: Optional[str]) -> int:
+        """Returns the number of entries logged for the user."""
+
+    @abstractmethod
+    def iter_entries(self, user: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """Yields every entry for the user, oldest first, without loading them all at once."""
+
+    @abstractmethod
+    def iter_range(self, users: Optional[Sequence[Optional[str]]] = None, first_date: Optional[str] = None,
+                   last_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yields entries for the given users (all users if None) between two 'YYYY-MM-DD' dates inclusive,
+        ordered by user, date and time, without loading them all at once."""
+
+    @abstractmethod
+    def append_set_events(self, events: Sequence[SetEvent]) -> None:
+        """Persists a batch of per-set events."""
+
+    @abstractmethod
+    def session_set_events(self, session_id: str) -> List[SetEvent]:
+        """Returns the recorded sets of one routine run, in completion order."""
+
+
+# --- 2. SQLite Backend ---
+
+class SQLiteConnectionPool:
+    """A fixed-size pool of SQLite connections shared by all Streamlit sessions."""
+
+    def __init__(self, path: str, size: int = 4, timeout: float = 30.0):
+        self.path = path
+        self._pool: 'queue.Queue[sqlite3.Connection]' = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._pool.put(self._connect(timeout))
+
+    def _connect(self, timeout: float) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=timeout, check_same_thread=False)
+        # WAL lets readers proceed while a writer holds the lock
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrows a connection for the duration of the block."""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        """Closes every pooled connection."""
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+class SQLiteLogStore(WorkoutLogStore):
+    """Local SQLite workout log, indexed by user and date, in WAL mode."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS workout_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user TEXT,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            routine TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_workout_log_user_date
+            ON workout_log (user, date, time);
+        CREATE TABLE IF NOT EXISTS set_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            user TEXT,
+            ts REAL NOT NULL,
+            module_key TEXT NOT NULL,
+            option_key TEXT NOT NULL,
+            exercise_name TEXT NOT NULL,
+            set_number INTEGER NOT NULL,
+            step_index INTEGER NOT NULL,
+            total_steps INTEGER NOT NULL,
+            seconds_since_previous REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_set_events_session
+            ON set_events (session_id, step_index);
+        CREATE INDEX IF NOT EXISTS idx_set_events_user_ts
+            ON set_events (user, ts);
+    """
+
+    def __init__(self, path: Optional[str] = None, pool_size: int = 4):
+        self.pool = SQLiteConnectionPool(path or default_db_path(), size=pool_size)
+        with self.pool.connection() as conn, conn:
+            conn.executescript(self.SCHEMA)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        with self.pool.connection() as conn, conn:
+            conn.execute(
+                "INSERT INTO workout_log (user, date, time, routine) VALUES (?, ?, ?, ?)",
+                (entry['user'], entry['date'], entry['time'], json.dumps(entry['routine'])),
+            )
+
+    def extend(self, entries: Iterable[Dict[str, Any]]) -> None:
+        with self.pool.connection() as conn, conn:
+            conn.executemany(
+                "INSERT INTO workout_log (user, date, time, routine) VALUES (?, ?, ?, ?)",
+                ((e['user'], e['date'], e['time'], json.dumps(e['routine'])) for e in entries),
+            )
+
+    def recent(self, user: Optional[str], limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT user, date, time, routine FROM workout_log WHERE user IS ? "
+                "ORDER BY date DESC, time DESC LIMIT ? OFFSET ?",
+                (user, limit, offset),
+            ).fetchall()
+        return [
+            {'date': d, 'time': t, 'routine': json.loads(r), 'user': u}
+            for u, d, t, r in rows
+        ]
+
+    def count(self, user: Optional[str]) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM workout_log WHERE user IS ?", (user,)
+            ).fetchone()[0]
+
+    def iter_entries(self, user: Optional[str], batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                "SELECT user, date, time, routine FROM workout_log WHERE user IS ? ORDER BY date, time",
+                (user,),
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for u, d, t, r in rows:
+                    yield {'date': d, 'time': t, 'routine': json.loads(r), 'user': u}
+
+    def iter_range(self, users: Optional[Sequence[Optional[str]]] = None, first_date: Optional[str] = None,
+                   last_date: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        clauses, params = [], []
+        if users is not None:
+            clauses.append("(" + " OR ".join(["user IS ?"] * len(users)) + ")" if users else "0")
+            params.extend(users)
+        if first_date is not None:
+            clauses.append("date >= ?")
+            params.append(first_date)
+        if last_date is not None:
+            clauses.append("date <= ?")
+            params.append(last_date)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.pool.connection() as conn:
+            # Ordered along idx_workout_log_user_date: one user's rows stream without a sort, but
+            # the OR over several users becomes a multi-index scan that SQLite sorts in a temp B-tree
+            cursor = conn.execute(
+                f"SELECT user, date, time, routine FROM workout_log{where} ORDER BY user, date, time",
+                params,
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for u, d, t, r in rows:
+                    yield {'date': d, 'time': t, 'routine': json.loads(r), 'user': u}
+
+    def append_set_events(self, events: Sequence[SetEvent]) -> None:
+        with self.pool.connection() as conn, conn:
+            conn.executemany(
+                "INSERT INTO set_events (session_id, user, ts, module_key, option_key, exercise_name, "
+                "set_number, step_index, total_steps, seconds_since_previous) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                events,
+            )
+
+    def session_set_events(self, session_id: str) -> List[SetEvent]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT session_id, user, ts, module_key, option_key, exercise_name, set_number, "
+                "step_index, total_steps, seconds_since_previous FROM set_events "
+                "WHERE session_id = ? ORDER BY step_index",
+                (session_id,),
+            ).fetchall()
+        return [SetEvent(*row) for row in rows]
+
+    def close(self):
+        self.pool.close()
+
+
+# --- 3. Session History Window ---
+
+class HistoryWindow:
+    """An already-sorted, page-at-a-time view of one user's workout history.
+
+    Kept in session state so reruns render from memory; the store is only
+    queried when the user asks for an older page. Entries are held in a
+    CompactLog, whose epoch-second timestamps double as the sort keys.
+    """
+
+    def __init__(self, store: WorkoutLogStore, user: Optional[str], page_size: int, module_keys: Sequence[str]):
+        self.store = store
+        self.user = user
+        self.page_size = page_size
+        # Rows sorted ascending by timestamp
+        self.log = CompactLog(module_keys)
+        self.total = store.count(user)
+        self.load_more()
+
+    def __len__(self) -> int:
+        return len(self.log)
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every logged entry for the user is held in the window."""
+        return len(self.log) >= self.total
+
+    def load_more(self):
+        """Fetches the next older page from the store."""
+        if self.exhausted:
+            return
+        older = self.store.recent(self.user, self.page_size, offset=len(self.log))
+        # Pages arrive newest-first and are all older than what is loaded
+        self.log.prepend(older[::-1])
+
+    def insert(self, entry: Dict[str, Any]):
+        """Adds a newly logged entry in sorted position, without re-sorting."""
+        self.total += 1
+        timestamps = self.log.timestamps
+        ts = encode_timestamp(entry['date'], entry['time'])
+        if timestamps and ts < timestamps[0] and len(self.log) < self.total - 1:
+            # Older than the loaded window; it will arrive with a later page
+            return
+        self.log.insert(bisect.bisect_right(timestamps, ts), entry)
+
+    def newest(self, n: int) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """Returns up to `n` (timestamp, entry) pairs, most recent first."""
+        start = max(len(self.log) - n, 0)
+        return [
+            (decode_timestamp(self.log.timestamps[i]), self.log.entry(i))
+            for i in range(len(self.log) - 1, start - 1, -1)
+        ]
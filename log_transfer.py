@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+from datetime import date, time
+from itertools import islice
+from typing import Any, Collection, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, TextIO
+
+from log_store import WorkoutLogStore
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+# CSV columns before the per-module A/B choices
+BASE_COLUMNS = ('user', 'date', 'time')
+
+
+class ImportResult(NamedTuple):
+    imported: int
+    skipped: int # Rows that failed validation
+
+
+def detect_format(filename: str) -> str:
+    """Picks the transfer format from a file name; anything not .jsonl/.ndjson is read as CSV."""
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+# --- 1. Export ---
+
+def export_chunks(entries: Iterable[Dict[str, Any]], fmt: str, module_keys: Sequence[str],
+                  chunk_rows: int = 1000) -> Iterator[str]:
+    """Serializes log entries lazily, yielding text chunks of up to `chunk_rows` rows.
+
+    CSV has one A/B column per module key; JSONL keeps the log entry shape.
+    Only one chunk is ever held in memory.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {EXPORT_FORMATS}")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if fmt == 'csv':
+        writer.writerow(BASE_COLUMNS + tuple(module_keys))
+
+    entries = iter(entries)
+    while True:
+        chunk = list(islice(entries, chunk_rows))
+        if not chunk:
+            break
+        if fmt == 'csv':
+            writer.writerows(
+                [e['user'] or '', e['date'], e['time']] + [e['routine'].get(k, '') for k in module_keys]
+                for e in chunk
+            )
+        else:
+            buffer.writelines(json.dumps(e, separators=(',', ':')) + '\n' for e in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # A CSV export with no rows still carries its header
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_export(entries: Iterable[Dict[str, Any]], fmt: str, module_keys: Sequence[str], out: TextIO,
+                 chunk_rows: int = 1000) -> int:
+    """Streams an export into a text file object; returns the number of rows written."""
+    rows = 0
+
+    def counted(source: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal rows
+        for entry in source:
+            rows += 1
+            yield entry
+
+    for chunk in export_chunks(counted(entries), fmt, module_keys, chunk_rows):
+        out.write(chunk)
+    return rows
+
+
+# --- 2. Import ---
+
+def _validated(entry: Dict[str, Any], module_keys: Collection[str]) -> Optional[Dict[str, Any]]:
+    """Normalizes one parsed row into the log entry shape, or returns None if it is malformed
+    or chooses an option for a module outside `module_keys`."""
+    try:
+        routine = {str(k): v for k, v in entry['routine'].items() if v != ''}
+        if not routine or any(k not in module_keys or v not in ('A', 'B') for k, v in routine.items()):
+            return None
+        return {
+            'date': date.fromisoformat(entry['date']).isoformat(),
+            'time': time.fromisoformat(entry['time']).strftime("%H:%M:%S"),
+            'routine': routine,
+            'user': entry.get('user') or None,
+        }
+    except (KeyError, TypeError, AttributeError, ValueError):
+        return None
+
+
+def parse_rows(lines: Iterable[str], fmt: str, module_keys: Sequence[str]) -> Iterator[Optional[Dict[str, Any]]]:
+    """Parses an export back into log entries for the catalog's `module_keys`, yielding None for each malformed row."""
+    module_keys = frozenset(module_keys)
+    if fmt == 'csv':
+        for row in csv.DictReader(lines):
+            base = {col: row.pop(col, None) for col in BASE_COLUMNS}
+            yield _validated({**base, 'routine': {k: v for k, v in row.items() if k is not None}}, module_keys)
+    elif fmt == 'jsonl':
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield _validated(json.loads(line), module_keys)
+            except json.JSONDecodeError:
+                yield None
+    else:
+        raise ValueError(f"Unknown import format {fmt!r}; expected one of {EXPORT_FORMATS}")
+
+
+def import_entries(store: WorkoutLogStore, rows: Iterable[Optional[Dict[str, Any]]], chunk_rows: int = 5000,
+                   user: Optional[str] = None) -> ImportResult:
+    """Writes parsed rows to the store in batches of `chunk_rows`, optionally reassigning them to `user`."""
+    imported = skipped = 0
+    batch: List[Dict[str, Any]] = []
+    for entry in rows:
+        if entry is None:
+            skipped += 1
+            continue
+        if user is not None:
+            entry['user'] = user
+        batch.append(entry)
+        if len(batch) >= chunk_rows:
+            store.extend(batch)
+            imported += len(batch)
+            batch = []
+    if batch:
+        store.extend(batch)
+        imported += len(batch)
+    return ImportResult(imported, skipped)
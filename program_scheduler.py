@@ -0,0 +1,202 @@
+import threading
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from log_store import WorkoutLogStore
+from workout_catalog import Catalog
+
+
+@dataclass(frozen=True)
+class ProgressionRules:
+    """When a module graduates from Option A to Option B, and which weekdays are training days."""
+    promote_after: int = 3 # Option A completions of a module before it is planned on Option B
+    training_weekdays: Tuple[int, ...] = (0, 2, 4) # Monday, Wednesday, Friday
+
+
+class DayPlan(NamedTuple):
+    day: date
+    routine_code: int # Catalog.routine_code planned for the day; for logged days, the last routine done
+    status: str # 'done', 'planned', 'missed' or 'rest'
+    sessions: int # Sessions logged on the day
+
+
+class ProgramSchedule:
+    """One user's day-by-day program under one catalog version, computed incrementally.
+
+    Days are computed in order from the program start, keeping a checkpoint
+    of every module's progression after each day. Logging a session only
+    discards the checkpoints from that day on, so the next request
+    recomputes the affected tail rather than the whole program. Past days
+    replay what was logged; from `today` on, planned sessions are assumed
+    to be completed, which is how the projection advances A to B.
+    """
+
+    def __init__(self, catalog: Catalog, rules: ProgressionRules, logged: Iterable[Tuple[int, int]] = ()):
+        self.catalog = catalog
+        self.rules = rules
+        self._bits = range(len(catalog.main_module_keys))
+        self._logged: Dict[int, List[int]] = {} # Ordinal day -> routine codes logged that day
+        for day, code in logged:
+            self._logged.setdefault(day, []).append(code)
+        self.start: Optional[int] = min(self._logged) if self._logged else None
+        self._today: Optional[int] = None
+        # Per computed day: planned routine code and status; checkpoints of the progression after it
+        self._codes = array('I')
+        self._statuses: List[str] = []
+        self._a_counts: List[Tuple[int, ...]] = []
+        self._promoted = array('I') # Bitmask of modules already on Option B
+
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of days currently computed and cached."""
+        return len(self._codes)
+
+    def _truncate(self, day: int):
+        """Drops cached days from `day` on; they are recomputed on the next request."""
+        if self.start is None:
+            return
+        keep = max(day - self.start, 0)
+        del self._codes[keep:]
+        del self._statuses[keep:]
+        del self._a_counts[keep:]
+        del self._promoted[keep:]
+
+    def record(self, day: int, code: int):
+        """Adds a logged session and invalidates the days it affects."""
+        self._logged.setdefault(day, []).append(code)
+        if self.start is None or day < self.start:
+            self._rebase(day)
+        else:
+            self._truncate(day)
+
+    def _rebase(self, day: int):
+        """Moves the program start to `day` (never later than it was), invalidating every cached day."""
+        self.start = day
+        self._truncate(day)
+
+    def _compute_through(self, last: int):
+        counts = list(self._a_counts[-1]) if self._a_counts else [0] * len(self._bits)
+        promoted = self._promoted[-1] if self._promoted else 0
+        promote_after = self.rules.promote_after
+        training_weekdays = self.rules.training_weekdays
+        first_logged = min(self._logged) if self._logged else None
+
+        for day in range(self.start + len(self._codes), last + 1):
+            logged = self._logged.get(day)
+            if logged:
+                status, planned, completed = 'done', logged[-1], logged
+            elif (day - 1) % 7 in training_weekdays: # Ordinal 1 is a Monday
+                planned = promoted
+                if day >= self._today:
+                    status, completed = 'planned', (planned,)
+                elif first_logged is not None and day > first_logged:
+                    status, completed = 'missed', ()
+                else:
+                    # Before the first session the program had not begun yet
+                    status, completed = 'rest', ()
+            else:
+                status, planned, completed = 'rest', promoted, ()
+
+            for code in completed:
+                for bit in self._bits:
+                    if code >> bit & 1:
+                        promoted |= 1 << bit
+                    else:
+                        counts[bit] += 1
+                        if counts[bit] >= promote_after:
+                            promoted |= 1 << bit
+
+            self._codes.append(planned)
+            self._statuses.append(status)
+            self._a_counts.append(tuple(counts))
+            self._promoted.append(promoted)
+
+    def plan_range(self, first: date, last: date, today: Optional[date] = None) -> List[DayPlan]:
+        """Plans every day from `first` to `last` inclusive, computing only what is not cached."""
+        today_ord = (today or date.today()).toordinal()
+        first_ord, last_ord = first.toordinal(), last.toordinal()
+        if self._today != today_ord:
+            # Days between the old and new 'today' flip between projected and actual
+            if self._today is not None:
+                self._truncate(min(self._today, today_ord))
+            self._today = today_ord
+        if self.start is None or first_ord < self.start:
+            self._rebase(first_ord)
+
+        self._compute_through(last_ord)
+        offset = first_ord - self.start
+        return [
+            DayPlan(
+                day=date.fromordinal(first_ord + i),
+                routine_code=self._codes[offset + i],
+                status=self._statuses[offset + i],
+                sessions=len(self._logged.get(first_ord + i, ())),
+            )
+            for i in range(last_ord - first_ord + 1)
+        ]
+
+
+class ProgramScheduler:
+    """Process-wide cache of program schedules, one per (user, catalog version).
+
+    A schedule caches its days, so together this is a cache keyed by
+    (user, catalog version, date). Schedules are built from the user's log
+    on first use and kept current with `record` as sessions are logged.
+    Building one for a new catalog version drops those of older versions,
+    so a hot-reloaded catalog doesn't leave every user's old schedule behind.
+    """
+
+    def __init__(self, store: WorkoutLogStore, rules: ProgressionRules = ProgressionRules()):
+        self.store = store
+        self.rules = rules
+        self._schedules: Dict[Tuple[Optional[str], str], ProgramSchedule] = {}
+        self._recorded = 0 # Log changes seen (records and clears); a build that overlapped one is redone
+        self._lock = threading.Lock()
+
+    def schedule(self, user: Optional[str], catalog: Catalog) -> ProgramSchedule:
+        key = (user, catalog.version)
+        while True:
+            with self._lock:
+                schedule = self._schedules.get(key)
+                recorded = self._recorded
+            if schedule is not None:
+                return schedule
+            # Read the log outside the lock, so schedules of different users build concurrently
+            logged = [
+                (date.fromisoformat(e['date']).toordinal(), catalog.routine_code(e['routine']))
+                for e in self.store.iter_entries(user)
+            ]
+            with self._lock:
+                # The log changed mid-build, so `logged` may be stale; read it again
+                if self._recorded == recorded:
+                    stale = [k for k in self._schedules if k[1] != catalog.version]
+                    for k in stale:
+                        del self._schedules[k]
+                    return self._schedules.setdefault(key, ProgramSchedule(catalog, self.rules, logged))
+
+    def plan_range(self, user: Optional[str], catalog: Catalog, first: date, last: date,
+                   today: Optional[date] = None) -> List[DayPlan]:
+        schedule = self.schedule(user, catalog)
+        with schedule.lock:
+            return schedule.plan_range(first, last, today)
+
+    def plan_for(self, user: Optional[str], catalog: Catalog, day: date, today: Optional[date] = None) -> DayPlan:
+        return self.plan_range(user, catalog, day, day, today)[0]
+
+    def clear(self):
+        """Drops every cached schedule, e.g. after a bulk import rewrote history."""
+        with self._lock:
+            self._recorded += 1
+            self._schedules.clear()
+
+    def record(self, user: Optional[str], catalog: Catalog, entry: Dict[str, Any]):
+        """Folds a newly logged session into the cached schedule, if there is one."""
+        with self._lock:
+            self._recorded += 1
+            schedule = self._schedules.get((user, catalog.version))
+        if schedule is not None:
+            with schedule.lock:
+                schedule.record(date.fromisoformat(entry['date']).toordinal(), catalog.routine_code(entry['routine']))
@@ -0,0 +1,70 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import struct
+from datetime import date
+from typing import NamedTuple, Optional
+
+# Views a token can restore, by index; the index is what goes into the token
+RESUMABLE_VIEWS = ('home', 'selection', 'workout', 'finished')
+
+# version, view index, workout date ordinal, routine code, step cursor, workout session id, user id
+_FIXED = struct.Struct('<BBIBH16sI')
+_VERSION = 3
+# Bytes of HMAC-SHA256 appended to the payload; without a valid tag a token is ignored
+_TAG_SIZE = 12
+
+
+class ResumeState(NamedTuple):
+    """Everything needed to put a reconnecting session back where it was."""
+    view: str
+    workout_date: date
+    routine_code: int # Catalog.routine_code of the selected A/B routine
+    step_cursor: int
+    session_id: Optional[str] # Hex workout session id, so set events continue the same run
+    user_id: int # UserRegistry id; name and age are looked up rather than carried in the URL
+
+
+def _tag(payload: bytes, key: bytes) -> bytes:
+    return hmac.new(key, payload, hashlib.sha256).digest()[:_TAG_SIZE]
+
+
+def encode_resume_token(state: ResumeState, key: bytes) -> str:
+    """Packs the state into a short URL-safe string (52 characters), signed with the server's `key`.
+
+    The signature is what stops a visitor from editing the user id to open
+    someone else's history, so `key` must stay secret.
+    """
+    payload = _FIXED.pack(
+        _VERSION,
+        RESUMABLE_VIEWS.index(state.view),
+        state.workout_date.toordinal(),
+        state.routine_code,
+        state.step_cursor,
+        bytes.fromhex(state.session_id) if state.session_id else bytes(16),
+        state.user_id,
+    )
+    return base64.urlsafe_b64encode(payload + _tag(payload, key)).rstrip(b'=').decode('ascii')
+
+
+def decode_resume_token(token: str, key: bytes) -> Optional[ResumeState]:
+    """Unpacks a token; returns None for anything malformed, unsigned by `key` or from another version."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload, tag = raw[:_FIXED.size], raw[_FIXED.size:]
+        if not hmac.compare_digest(tag, _tag(payload, key)):
+            return None
+        version, view_idx, ordinal, routine_code, cursor, session, user_id = _FIXED.unpack_from(payload, 0)
+        if version != _VERSION:
+            return None
+        return ResumeState(
+            view=RESUMABLE_VIEWS[view_idx],
+            workout_date=date.fromordinal(ordinal),
+            routine_code=routine_code,
+            step_cursor=cursor,
+            session_id=session.hex() if any(session) else None,
+            user_id=user_id,
+        )
+    except (binascii.Error, struct.error, IndexError, ValueError):
+        return None
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from workout_catalog import Catalog
+
+# Assumed pace of counted work, used to put reps-based sets on the clock
+SECONDS_PER_REP = 3
+# Assumed changeover between consecutive sets (getting into position, switching legs)
+SET_TRANSITION_SECONDS = 15
+
+
+@dataclass(frozen=True, slots=True)
+class ModuleLoad:
+    sets: int
+    timed_sets: int
+    reps: int # Total reps across counted sets
+    seconds: int # Total time under tension across timed sets
+
+
+@dataclass(frozen=True, slots=True)
+class RoutineMetrics:
+    """Cost summary of one A/B routine, precomputed for the selection page."""
+    code: int # Catalog.routine_code of the routine
+    set_count: int
+    timed_set_count: int
+    total_reps: int
+    work_seconds: int # Time under tension plus the reps converted at SECONDS_PER_REP
+    module_loads: Tuple[ModuleLoad, ...] # In session order, warmup first
+
+    def estimated_seconds(self, rest_seconds: int = 0) -> int:
+        """Estimated session length, including set changeovers and rest after each timed set."""
+        return self.work_seconds + self.set_count * SET_TRANSITION_SECONDS + self.timed_set_count * rest_seconds
+
+
+def _module_loads(catalog: Catalog) -> List[Tuple[ModuleLoad, ...]]:
+    """Load of every module option: loads[module_id][option_id]."""
+    loads = []
+    for module in catalog.modules:
+        per_option = []
+        for option in module.options:
+            sets = timed_sets = reps = seconds = 0
+            for ex in option.progression:
+                sets += ex.sets
+                if ex.reps is not None:
+                    reps += ex.sets * ex.reps
+                else:
+                    timed_sets += ex.sets
+                    seconds += ex.sets * ex.time
+            per_option.append(ModuleLoad(sets=sets, timed_sets=timed_sets, reps=reps, seconds=seconds))
+        loads.append(tuple(per_option))
+    return loads
+
+
+def build_metrics_table(catalog: Catalog) -> Tuple[RoutineMetrics, ...]:
+    """Precomputes metrics for every A/B routine, indexed by routine code."""
+    option_loads = _module_loads(catalog)
+    table = []
+    for code in range(catalog.routine_count):
+        # Warmup is fixed at Option A; main module i follows bit i of the code
+        module_loads = (option_loads[0][0],) + tuple(
+            option_loads[bit + 1][code >> bit & 1] for bit in range(len(catalog.main_module_keys))
+        )
+        total_reps = sum(load.reps for load in module_loads)
+        table.append(RoutineMetrics(
+            code=code,
+            set_count=sum(load.sets for load in module_loads),
+            timed_set_count=sum(load.timed_sets for load in module_loads),
+            total_reps=total_reps,
+            work_seconds=sum(load.seconds for load in module_loads) + total_reps * SECONDS_PER_REP,
+            module_loads=module_loads,
+        ))
+    return tuple(table)
@@ -0,0 +1,93 @@
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Deque, List
+
+from log_store import SetEvent, WorkoutLogStore
+
+logger = logging.getLogger(__name__)
+
+
+class SetEventWriter:
+    """Buffers per-set events in memory and writes them to the store in batches.
+
+    `record` only appends to a bounded ring buffer, so the "Set Complete"
+    hot path never waits on I/O; a background thread drains the buffer every
+    `flush_interval` seconds, or sooner once `batch_size` events are waiting.
+    If the store falls behind by more than `capacity` events, the oldest are
+    dropped and counted in `dropped`; that includes a failed batch that no
+    longer fits back into the buffer.
+    """
+
+    def __init__(self, store: WorkoutLogStore, capacity: int = 10_000, batch_size: int = 256,
+                 flush_interval: float = 2.0):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._buffer: Deque[SetEvent] = deque(maxlen=capacity)
+        # Guards appends against a failed batch being put back; popping needs no lock
+        self._buffer_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="set-event-writer", daemon=True)
+        self._thread.start()
+        # Don't lose the tail of the buffer when the server shuts down
+        atexit.register(self.close)
+
+    def record(self, event: SetEvent):
+        """Queues an event; O(1) and never blocks on storage."""
+        with self._buffer_lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(event)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def flush(self):
+        """Writes everything buffered so far."""
+        with self._flush_lock:
+            while self._buffer:
+                batch: List[SetEvent] = []
+                while self._buffer and len(batch) < self.batch_size:
+                    batch.append(self._buffer.popleft())
+                try:
+                    self.store.append_set_events(batch)
+                except Exception:
+                    self._requeue(batch)
+                    raise
+
+    def _requeue(self, batch: List[SetEvent]):
+        """Puts a failed batch back at the front for the next flush to retry.
+
+        The batch is older than anything buffered since, so when the buffer
+        has refilled, the batch's oldest events are the ones dropped.
+        """
+        with self._buffer_lock:
+            room = self._buffer.maxlen - len(self._buffer)
+            kept = batch[len(batch) - room:] if room < len(batch) else batch
+            self.dropped += len(batch) - len(kept)
+            self._buffer.extendleft(reversed(kept))
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush set events; will retry")
+
+    def close(self):
+        """Stops the background thread after a final flush."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
@@ -0,0 +1,29 @@
+"""Shared fixtures: a fresh workout database per test and AppTest sessions of the app."""
+import os
+import sys
+from typing import Callable
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+APP_PATH = os.path.join(ROOT, 'ankle_fitness_app.py')
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch) -> str:
+    """Points the app at an empty database for the test."""
+    path = str(tmp_path / 'workout_log.db')
+    monkeypatch.setenv('ANKLE_FITNESS_DB', path)
+    # Shared resources (store, registry, scheduler) would otherwise outlive the test's database
+    st.cache_resource.clear()
+    yield path
+    st.cache_resource.clear()
+
+
+@pytest.fixture
+def new_app(db_path) -> Callable[[], AppTest]:
+    """Creates app sessions on the test's database; set query params before the first run."""
+    return lambda: AppTest.from_file(APP_PATH, default_timeout=60)
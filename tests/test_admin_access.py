@@ -0,0 +1,17 @@
+"""The ?admin= token gates the admin views without ever breaking the page for other visitors."""
+import pytest
+
+
+@pytest.mark.parametrize('admin, expected', [
+    ('clinic-token', True),
+    ('wrong', False),
+    ('é', False),
+    ('', False),
+])
+def test_admin_token(admin, expected, new_app, monkeypatch):
+    monkeypatch.setenv('ANKLE_FITNESS_ADMIN_TOKEN', 'clinic-token')
+    at = new_app()
+    at.query_params['admin'] = admin
+    at.run()
+    assert not at.exception
+    assert any(b.key == 'btn_open_roster' for b in at.button) is expected
@@ -0,0 +1,36 @@
+"""CompactLog expands back to exactly the entries it was given, for any routine the app can log."""
+from compact_log import CompactLog
+from workout_catalog import load_catalog
+
+CATALOG = load_catalog()
+
+
+def test_every_routine_round_trips():
+    log = CompactLog(CATALOG.full_sequence_keys)
+    entries = [
+        {'date': f"2026-03-{1 + code % 28:02d}", 'time': f"{code % 24:02d}:{code % 60:02d}:59",
+         'routine': CATALOG.routine_options(code), 'user': f"u{code % 3}" if code % 4 else None}
+        for code in range(CATALOG.routine_count)
+    ]
+    log.extend(entries)
+    assert list(log) == entries
+    assert log.nbytes == len(entries) * (8 + 1 + 1 + 4)
+
+
+def test_insert_and_prepend_keep_positions():
+    log = CompactLog(CATALOG.full_sequence_keys)
+    a, b, c = (
+        {'date': '2026-03-02', 'time': f"0{h}:00:00", 'routine': CATALOG.routine_options(h), 'user': 'u1'}
+        for h in (1, 2, 3)
+    )
+    log.append(c)
+    log.prepend([a])
+    log.insert(1, b)
+    assert list(log) == [a, b, c]
+
+
+def test_missing_modules_stay_missing_and_unknown_modules_are_dropped():
+    keys = CATALOG.full_sequence_keys
+    log = CompactLog(keys)
+    log.append({'date': '2026-03-02', 'time': '08:00:00', 'routine': {keys[2]: 'B', 'balance': 'A'}, 'user': 'u1'})
+    assert log.entry(0)['routine'] == {keys[2]: 'B'}
@@ -0,0 +1,51 @@
+"""Exports parse back into the entries they were written from, in both formats."""
+import io
+
+import pytest
+
+from log_store import SQLiteLogStore
+from log_transfer import EXPORT_FORMATS, export_chunks, parse_rows, write_export
+from workout_catalog import load_catalog
+
+CATALOG = load_catalog()
+KEYS = CATALOG.full_sequence_keys
+
+ENTRIES = [
+    {'date': '2026-03-02', 'time': '08:15:00', 'routine': CATALOG.routine_options(0), 'user': 'u1'},
+    {'date': '2026-03-04', 'time': '18:00:59', 'routine': CATALOG.routine_options(21), 'user': 'u1'},
+    {'date': '2026-03-04', 'time': '07:30:00', 'routine': CATALOG.routine_options(31), 'user': 'u2'},
+]
+
+
+@pytest.mark.parametrize('fmt', EXPORT_FORMATS)
+def test_round_trip(fmt):
+    out = io.StringIO()
+    assert write_export(iter(ENTRIES), fmt, KEYS, out, chunk_rows=2) == len(ENTRIES)
+    assert list(parse_rows(io.StringIO(out.getvalue()), fmt, KEYS)) == ENTRIES
+
+
+def test_empty_csv_export_keeps_its_header():
+    assert "".join(export_chunks([], 'csv', KEYS)) == ",".join(('user', 'date', 'time') + KEYS) + "\n"
+
+
+@pytest.mark.parametrize('line', [
+    '{"date": "2026-13-01", "time": "08:00:00", "routine": {"plyometrics": "A"}}',
+    '{"date": "2026-03-01", "time": "08:00:00", "routine": {"plyometrics": "C"}}',
+    '{"date": "2026-03-01", "time": "08:00:00", "routine": {"balance": "A"}}',
+    '{"date": "2026-03-01", "time": "08:00:00", "routine": {}}',
+    'not json',
+])
+def test_malformed_rows_are_skipped(line):
+    assert list(parse_rows([line], 'jsonl', KEYS)) == [None]
+
+
+def test_signed_out_visitors_see_no_history(db_path, new_app):
+    store = SQLiteLogStore(db_path)
+    # A CSV row with a blank user column is stored under NULL, the signed-out user key
+    store.extend(parse_rows(["user,date,time," + ",".join(KEYS), ",2026-03-02,08:15:00," + ",".join("A" * len(KEYS))],
+                            'csv', KEYS))
+    at = new_app()
+    at.run()
+    assert not at.exception
+    assert "Workout History" not in [h.value for h in at.sidebar.subheader]
+    store.close()
@@ -0,0 +1,59 @@
+"""The incremental program schedule must always agree with one computed from scratch."""
+from dataclasses import replace
+from datetime import date, timedelta
+
+from log_store import SQLiteLogStore
+from program_scheduler import ProgramSchedule, ProgramScheduler, ProgressionRules
+from workout_catalog import load_catalog
+
+CATALOG = load_catalog()
+RULES = ProgressionRules()
+ALL_B = CATALOG.routine_count - 1
+MONDAY = date(2026, 3, 2)
+
+
+def days(*offsets):
+    return [(MONDAY + timedelta(days=d)).toordinal() for d in offsets]
+
+
+def test_promotes_to_option_b_after_three_option_a_sessions():
+    schedule = ProgramSchedule(CATALOG, RULES, [(d, 0) for d in days(0, 2, 4)])
+    plans = schedule.plan_range(MONDAY, MONDAY + timedelta(days=13), today=MONDAY + timedelta(days=7))
+    assert [p.status for p in plans[:7]] == ['done', 'rest', 'done', 'rest', 'done', 'rest', 'rest']
+    assert plans[7].status == 'planned' and plans[7].routine_code == ALL_B
+
+
+def test_days_before_the_first_session_are_rest_and_skipped_days_are_missed():
+    schedule = ProgramSchedule(CATALOG, RULES, [(d, 0) for d in days(2)])
+    plans = schedule.plan_range(MONDAY, MONDAY + timedelta(days=6), today=MONDAY + timedelta(days=7))
+    assert [p.status for p in plans] == ['rest', 'rest', 'done', 'rest', 'missed', 'rest', 'rest']
+
+
+def test_incremental_updates_match_a_fresh_schedule():
+    first, last, today = MONDAY, MONDAY + timedelta(days=55), MONDAY + timedelta(days=20)
+    logged = [(d, code) for d, code in zip(days(0, 2, 4, 7, 9), (0, 1, 0, 3, 0))]
+    schedule = ProgramSchedule(CATALOG, RULES, logged)
+    schedule.plan_range(first, last, today)
+
+    # Sessions logged out of order, before the cached start and on already-computed days
+    for day, code in zip(days(11, -3, 4, 16), (0, 2, 5, 0)):
+        schedule.record(day, code)
+        logged.append((day, code))
+        fresh = ProgramSchedule(CATALOG, RULES, logged)
+        assert schedule.plan_range(first, last, today) == fresh.plan_range(first, last, today)
+
+    # Moving 'today' flips projected days to actual ones
+    later = today + timedelta(days=9)
+    assert schedule.plan_range(first, last, later) == ProgramSchedule(CATALOG, RULES, logged).plan_range(first, last, later)
+
+
+def test_a_new_catalog_version_evicts_the_old_schedules(db_path):
+    store = SQLiteLogStore(db_path)
+    scheduler = ProgramScheduler(store)
+    old = [scheduler.schedule(user, CATALOG) for user in ('u1', 'u2')]
+    assert scheduler.schedule('u1', CATALOG) is old[0]
+
+    edited = replace(CATALOG, version='edited')
+    scheduler.schedule('u1', edited)
+    assert set(scheduler._schedules) == {('u1', 'edited')}
+    store.close()
@@ -0,0 +1,68 @@
+"""Every user action should cost one script run, with no double renders.
+
+AppTest always runs the whole script, even for a button inside a fragment, so
+these checks cover full runs; `fragment_runs` must then grow by at most one per
+fragment per run. They cannot tell a fragment-scoped run from a full one. On a
+server, "Set Complete" reruns only the workout fragment. "End Session Early"
+lives outside the fragment, and the last set's callback calls st.rerun(), so
+each of those is one full-app run rather than a fragment run followed by a
+full one.
+"""
+import pytest
+from streamlit.testing.v1 import AppTest
+
+
+@pytest.fixture
+def app(new_app) -> AppTest:
+    at = new_app()
+    at.run()
+    assert not at.exception
+    return at
+
+
+def act(at: AppTest, widget) -> AppTest:
+    """Performs one action and checks it cost one full run and at most one run of each fragment."""
+    runs, fragments = at.session_state.rerun_count, dict(at.session_state.fragment_runs)
+    widget.run()
+    assert not at.exception, at.exception[0].value
+    assert at.session_state.rerun_count == runs + 1
+    for name, count in at.session_state.fragment_runs.items():
+        assert count - fragments.get(name, 0) <= 1, f"fragment {name!r} rendered twice in one run"
+    return at
+
+
+def register(at: AppTest):
+    at.text_input(key="input_name").input("Alice")
+    at.text_input(key="input_number").input("0123456789")
+    at.text_input(key="input_age").input("30")
+    act(at, at.button(key="btn_submit_details").click())
+    assert at.session_state.view == 'selection'
+
+
+def test_full_workout_costs_one_run_per_action(app):
+    register(app)
+    app.radio(key="radio_plyometrics").set_value('B')
+    act(app, app.button(key="btn_update_plan").click())
+    act(app, app.button(key="btn_start_full_routine").click())
+    assert app.session_state.view == 'workout'
+
+    while app.session_state.view == 'workout':
+        act(app, app.button(key="btn_complete_set").click())
+    assert app.session_state.view == 'finished'
+    act(app, app.button(key="btn_plan_again").click())
+    assert app.session_state.view == 'selection'
+
+
+def test_side_views_and_abandoning_cost_one_run_each(app):
+    register(app)
+    for open_key, close_key in (("btn_open_program", "btn_close_program"),
+                                ("btn_open_analytics", "btn_close_analytics")):
+        act(app, app.button(key=open_key).click())
+        act(app, app.button(key=close_key).click())
+        assert app.session_state.view == 'selection'
+
+    act(app, app.button(key="btn_start_full_routine").click())
+    act(app, app.button(key="btn_complete_set").click())
+    act(app, app.button(key="btn_end_early").click())
+    assert app.session_state.view == 'selection'
+    assert app.session_state.engine.routine_plan is None
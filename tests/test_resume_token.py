@@ -0,0 +1,39 @@
+"""Resume tokens must round-trip and must not sign anyone in without the server's key."""
+from datetime import date
+
+from log_store import SQLiteLogStore
+from resume_token import ResumeState, decode_resume_token, encode_resume_token
+from user_registry import UserRegistry
+
+STATE = ResumeState('selection', date(2026, 3, 2), 5, 0, None, 1)
+
+
+def test_round_trip_needs_the_signing_key():
+    token = encode_resume_token(STATE, b'k' * 32)
+    assert decode_resume_token(token, b'k' * 32) == STATE
+    assert decode_resume_token(token, b'x' * 32) is None
+    # Any edit to the payload, e.g. walking the user id, breaks the signature
+    tampered = encode_resume_token(STATE._replace(user_id=2), b'k' * 32)[:-16] + token[-16:]
+    assert decode_resume_token(tampered, b'k' * 32) is None
+
+
+def test_forged_token_does_not_sign_in(db_path, new_app):
+    def open_with_token(token: str):
+        at = new_app()
+        at.query_params['s'] = token
+        at.run()
+        assert not at.exception
+        return at
+
+    store = SQLiteLogStore(db_path)
+    registry = UserRegistry(store.pool)
+    registry.register("0123456789", "Alice", "30")
+
+    forged = open_with_token(encode_resume_token(STATE, b'\0' * 32))
+    assert forged.session_state.user_id is None
+    assert forged.session_state.view == 'home'
+
+    signed = open_with_token(encode_resume_token(STATE, registry.resume_key))
+    assert signed.session_state.user_name == "Alice"
+    assert signed.session_state.view == 'selection'
+    store.close()
@@ -0,0 +1,46 @@
+"""The set-event writer keeps the newest events and counts every event it loses."""
+import pytest
+
+from log_store import SetEvent
+from set_events import SetEventWriter
+
+
+def event(n: int) -> SetEvent:
+    return SetEvent("s", "u1", float(n), "plyometrics", "A", "Hops", 1, n, 100, 1.0)
+
+
+class FlakyStore:
+    """Fails while `fail` is set; sessions keep recording `arrivals` during the failing write."""
+
+    def __init__(self):
+        self.fail = True
+        self.arrivals = []
+        self.writer = None
+        self.written = []
+
+    def append_set_events(self, events):
+        if self.fail:
+            for e in self.arrivals:
+                self.writer.record(e)
+            self.arrivals = []
+            raise OSError("database is locked")
+        self.written.extend(events)
+
+
+def test_failed_batch_is_requeued_within_capacity():
+    store = FlakyStore()
+    writer = store.writer = SetEventWriter(store, capacity=4, batch_size=3, flush_interval=3600)
+    for n in range(4):
+        writer.record(event(n))
+    store.arrivals = [event(4), event(5)]
+    with pytest.raises(OSError):
+        writer.flush() # Writes 0-2 and fails while 4 and 5 arrive
+
+    # Only one slot was left for the failed batch: its oldest events go, the newest stay
+    assert [e.step_index for e in writer._buffer] == [2, 3, 4, 5]
+    assert writer.dropped == 2
+
+    store.fail = False
+    writer.close()
+    assert [e.step_index for e in store.written] == [2, 3, 4, 5]
+    assert writer.pending() == 0
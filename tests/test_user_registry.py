@@ -0,0 +1,38 @@
+"""Registering must never take over the user already holding a contact number."""
+import pytest
+
+from log_store import SQLiteLogStore
+from user_registry import ContactAlreadyRegistered, UserRegistry
+
+
+def test_register_rejects_a_taken_number(db_path):
+    store = SQLiteLogStore(db_path)
+    registry = UserRegistry(store.pool)
+    alice = registry.register("0123456789", "Alice", "30")
+
+    with pytest.raises(ContactAlreadyRegistered):
+        registry.register("012-345 6789", "Mallory", "99")
+    # A fresh registry reads the table, not the in-memory index
+    assert UserRegistry(store.pool).lookup("0123456789") == alice
+    store.close()
+
+
+def test_new_here_form_does_not_sign_in_as_existing_user(db_path, new_app):
+    store = SQLiteLogStore(db_path)
+    UserRegistry(store.pool).register("0123456789", "Alice", "30")
+
+    at = new_app()
+    at.run()
+    at.text_input(key="input_name").input("Mallory")
+    at.text_input(key="input_number").input("0123456789")
+    at.text_input(key="input_age").input("99")
+    at.button(key="btn_submit_details").click().run()
+    assert not at.exception
+    assert at.session_state.user_id is None
+    assert at.session_state.view == 'home'
+    assert "already registered" in at.session_state.details_error
+
+    at.text_input(key="input_returning_number").input("0123456789")
+    at.button(key="btn_returning_user").click().run()
+    assert at.session_state.user_name == "Alice"
+    store.close()
@@ -0,0 +1,75 @@
+"""Catalog validation: the shipped file compiles, and malformed edits fail with a CatalogError."""
+import copy
+import json
+import os
+
+import pytest
+
+from workout_catalog import CATALOG_PATH, MAX_MAIN_MODULES, CatalogError, CatalogReloader, compile_catalog
+
+
+@pytest.fixture
+def raw():
+    with open(CATALOG_PATH) as f:
+        return json.load(f)
+
+
+def test_shipped_catalog_compiles(raw):
+    catalog = compile_catalog(raw)
+    assert catalog.full_sequence_keys == (raw['warmup'], *raw['main_modules'])
+    assert catalog.routine_count == 1 << len(raw['main_modules'])
+    for code in range(catalog.routine_count):
+        assert catalog.routine_code(catalog.routine_options(code)) == code
+
+
+def first_exercise(raw):
+    return raw['modules'][raw['main_modules'][0]]['options']['A']['progression'][0]
+
+
+@pytest.mark.parametrize('edit, message', [
+    (lambda raw: first_exercise(raw).update(sets=0), "'sets' must be a positive integer"),
+    (lambda raw: first_exercise(raw).update(unit="min"), "'unit' must be one of"),
+    (lambda raw: first_exercise(raw).pop('name'), "'name' must be a non-empty string"),
+    (lambda raw: raw['main_modules'].append('missing'), "sequenced but not defined"),
+    (lambda raw: raw['main_modules'].append(raw['main_modules'][0]), "must be unique"),
+    (lambda raw: raw['modules'][raw['main_modules'][0]]['options'].pop('B'), "'options' must be exactly"),
+    (lambda raw: raw.update(main_modules=[]), "'main_modules' must be a non-empty list"),
+])
+def test_malformed_edits_are_rejected(raw, edit, message):
+    edit(raw)
+    with pytest.raises(CatalogError, match=message):
+        compile_catalog(raw)
+
+
+def test_main_module_limit(raw):
+    template = raw['modules'][raw['main_modules'][0]]
+    while len(raw['main_modules']) <= MAX_MAIN_MODULES:
+        key = f"extra{len(raw['main_modules'])}"
+        raw['modules'][key] = copy.deepcopy(template)
+        raw['main_modules'].append(key)
+    with pytest.raises(CatalogError, match=f"at most {MAX_MAIN_MODULES}"):
+        compile_catalog(raw)
+
+
+def test_reloader_keeps_the_last_good_catalog(raw, tmp_path):
+    path = tmp_path / 'catalog.json'
+    path.write_text(json.dumps(raw))
+    reloader = CatalogReloader(str(path))
+    good = reloader.current()
+
+    def save(data, mtime_ns):
+        path.write_text(data)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    first_exercise(raw)['sets'] = 0
+    save(json.dumps(raw), 1_000_000_000)
+    assert reloader.current() is good
+    assert "'sets' must be a positive integer" in reloader.error
+
+    path.unlink() # An editor replacing the file mid-save
+    assert reloader.current() is good and reloader.error
+
+    first_exercise(raw)['sets'] = 4
+    save(json.dumps(raw), 2_000_000_000)
+    assert reloader.current().version != good.version
+    assert reloader.error is None
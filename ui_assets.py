@@ -0,0 +1,46 @@
+import html
+import re
+from typing import Dict, Tuple
+
+from workout_catalog import Catalog, Exercise
+
+# (module id, option key, exercise index, set number) of one workout card
+CardKey = Tuple[int, str, int, int]
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCTUATION = re.compile(r"\s*([{}:;,>])\s*")
+
+
+def minify_css(css: str) -> str:
+    """Strips comments and insignificant whitespace, so the stylesheet costs fewer bytes per send."""
+    css = _CSS_COMMENT.sub("", css)
+    css = _CSS_SPACE.sub(" ", css)
+    return _CSS_PUNCTUATION.sub(r"\1", css).replace(";}", "}").strip()
+
+
+def render_exercise_card(exercise: Exercise, exercise_index: int, exercise_count: int, set_number: int) -> str:
+    """Compact HTML of the workout card for one set; catalog text is escaped."""
+    return (
+        '<div class="workout-display">'
+        f'<p class="exercise-name">Exercise {exercise_index + 1}/{exercise_count}</p>'
+        f'<h2>{html.escape(exercise.name)}</h2>'
+        '<div class="sets-reps-box">'
+        f'<span class="set-counter">SET {set_number} / {exercise.sets}</span>'
+        f'<span class="reps-time">🎯 {exercise.amount} {html.escape(exercise.unit)}</span>'
+        '</div>'
+        f'<p class="detail-text">{html.escape(exercise.detail)}</p>'
+        '</div>'
+    )
+
+
+def build_card_table(catalog: Catalog) -> Dict[CardKey, str]:
+    """Pre-renders the card of every set of every module option in the catalog."""
+    cards = {}
+    for module in catalog.modules:
+        for option in module.options:
+            count = len(option.progression)
+            for ex_idx, ex in enumerate(option.progression):
+                for set_number in range(1, ex.sets + 1):
+                    cards[(module.id, option.key, ex_idx, set_number)] = render_exercise_card(ex, ex_idx, count, set_number)
+    return cards
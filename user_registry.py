@@ -0,0 +1,124 @@
+import hashlib
+import secrets
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from log_store import SQLiteConnectionPool
+
+
+class UserRecord(NamedTuple):
+    """A registered user; the contact number itself is never stored, only its salted hash."""
+    user_id: int
+    contact_hash: str
+    name: str # First name, used for greetings
+    age: str
+    created_at: float # Epoch seconds of registration
+
+    @property
+    def user_key(self) -> str:
+        """Stable identifier written to the workout log in place of the (colliding) first name."""
+        return f"u{self.user_id}"
+
+
+class ContactAlreadyRegistered(ValueError):
+    """Raised when registering a contact number that already belongs to a user."""
+
+
+def normalize_contact(number: str) -> str:
+    """Reduces a contact number to its digits, so '012-345 6789' and '0123456789' match."""
+    return "".join(ch for ch in number if ch.isdigit())
+
+
+class UserRegistry:
+    """Persistent registry of users, keyed by a salted hash of their contact number.
+
+    Lives in the same SQLite database as the workout log. Lookups go through
+    an in-memory hash index shared by every session of the process, falling
+    back to the table's unique index on a miss, so recognising a returning
+    user costs one dict probe once they have been seen.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contact_hash TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            age TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS registry_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool):
+        self.pool = pool
+        with self.pool.connection() as conn, conn:
+            conn.executescript(self.SCHEMA)
+            # Per-database salt, so hashes from one install can't be matched against another's
+            conn.execute(
+                "INSERT OR IGNORE INTO registry_meta (key, value) VALUES ('contact_salt', ?)",
+                (secrets.token_hex(16),),
+            )
+            # Per-database key signing resume tokens, shared by every server process on the database
+            conn.execute(
+                "INSERT OR IGNORE INTO registry_meta (key, value) VALUES ('resume_key', ?)",
+                (secrets.token_hex(32),),
+            )
+            meta = dict(conn.execute(
+                "SELECT key, value FROM registry_meta WHERE key IN ('contact_salt', 'resume_key')"
+            ).fetchall())
+        self._salt = meta['contact_salt']
+        self.resume_key = bytes.fromhex(meta['resume_key'])
+        self._by_hash: Dict[str, UserRecord] = {}
+        self._by_id: Dict[int, UserRecord] = {}
+
+    def hash_contact(self, number: str) -> str:
+        return hashlib.sha256(f"{self._salt}:{normalize_contact(number)}".encode('utf-8')).hexdigest()
+
+    def _remember(self, record: UserRecord) -> UserRecord:
+        self._by_hash[record.contact_hash] = record
+        self._by_id[record.user_id] = record
+        return record
+
+    def _fetch(self, column: str, value) -> Optional[UserRecord]:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                f"SELECT id, contact_hash, name, age, created_at FROM users WHERE {column} = ?", (value,)
+            ).fetchone()
+        return self._remember(UserRecord(*row)) if row else None
+
+    def lookup(self, number: str) -> Optional[UserRecord]:
+        """Finds the user registered under this contact number, if any."""
+        contact_hash = self.hash_contact(number)
+        return self._by_hash.get(contact_hash) or self._fetch('contact_hash', contact_hash)
+
+    def get(self, user_id: int) -> Optional[UserRecord]:
+        return self._by_id.get(user_id) or self._fetch('id', user_id)
+
+    def all_users(self) -> List[UserRecord]:
+        """Every registered user, in registration order."""
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT id, contact_hash, name, age, created_at FROM users ORDER BY id").fetchall()
+        return [self._remember(UserRecord(*row)) for row in rows]
+
+    def register(self, number: str, name: str, age: str) -> UserRecord:
+        """Registers a new user under the contact number.
+
+        An existing user is never changed here: the number alone proves nothing
+        about who is typing it, so a taken number raises ContactAlreadyRegistered.
+        """
+        contact_hash = self.hash_contact(number)
+        with self.pool.connection() as conn, conn:
+            inserted = conn.execute(
+                "INSERT INTO users (contact_hash, name, age, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (contact_hash) DO NOTHING",
+                (contact_hash, name, age, time.time()),
+            ).rowcount
+            if not inserted:
+                raise ContactAlreadyRegistered(number)
+            row = conn.execute(
+                "SELECT id, contact_hash, name, age, created_at FROM users WHERE contact_hash = ?", (contact_hash,)
+            ).fetchone()
+        return self._remember(UserRecord(*row))
@@ -0,0 +1,178 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from routine_metrics import RoutineMetrics
+from workout_catalog import Catalog
+
+# Sessions per week a program is prescribed at; adherence is measured against it
+TARGET_SESSIONS_PER_WEEK = 3
+
+
+def week_number(day: int) -> int:
+    """Monday-based week index of a proleptic ordinal day (ordinal 1 is a Monday)."""
+    return (day - 1) // 7
+
+
+def week_start(week: int) -> date:
+    return date.fromordinal(week * 7 + 1)
+
+
+@dataclass(frozen=True)
+class WeeklyLoad:
+    """Per-week training volume; every matrix is indexed [week, module_id]."""
+    weeks: np.ndarray # Week indices, consecutive
+    sessions: np.ndarray
+    sets: np.ndarray
+    reps: np.ndarray # sets x reps of counted work
+    seconds: np.ndarray # Seconds under tension of timed work
+    b_share: np.ndarray # [week, main_module]: fraction of that week's sessions on Option B
+
+
+@dataclass(frozen=True)
+class AdherenceSummary:
+    total_sessions: int
+    current_streak: int # Consecutive training days ending today or yesterday
+    longest_streak: int
+    recent_adherence: float # Mean of sessions / target over the last few weeks, each week capped at 1
+    weeks_on_target: float # Fraction of weeks since the first session that met the target
+
+
+class TrainingLoadAnalytics:
+    """Columnar store of workout log entries with vectorized training-load aggregates.
+
+    Entries are held as two NumPy columns (ordinal day, routine code). Weekly
+    aggregates are built in one vectorized pass and then updated in place as
+    new sessions are appended, so a rerun only reads the cached arrays.
+    """
+
+    def __init__(self, catalog: Catalog, metrics_table: Tuple[RoutineMetrics, ...], capacity: int = 1024):
+        self.catalog = catalog
+        # Load lookup matrices [routine_code, module_id] taken from the precomputed metrics
+        self._sets = np.array([[l.sets for l in m.module_loads] for m in metrics_table], dtype=np.int64)
+        self._reps = np.array([[l.reps for l in m.module_loads] for m in metrics_table], dtype=np.int64)
+        self._seconds = np.array([[l.seconds for l in m.module_loads] for m in metrics_table], dtype=np.int64)
+        self._bits = np.arange(len(catalog.main_module_keys), dtype=np.int64)
+
+        self._days = np.empty(capacity, dtype=np.int32)
+        self._codes = np.empty(capacity, dtype=np.int16)
+        self.size = 0
+
+        self._first_week: Optional[int] = None
+        self._sessions = np.zeros(0, dtype=np.int64)
+        self._week_sets = np.zeros((0, len(catalog.modules)), dtype=np.int64)
+        self._week_reps = np.zeros((0, len(catalog.modules)), dtype=np.int64)
+        self._week_seconds = np.zeros((0, len(catalog.modules)), dtype=np.int64)
+        self._week_b = np.zeros((0, len(self._bits)), dtype=np.int64)
+        self._summary_cache: Dict[Tuple[int, int], AdherenceSummary] = {}
+
+    @property
+    def days(self) -> np.ndarray:
+        return self._days[:self.size]
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self.size]
+
+    def extend(self, entries: Iterable[Dict[str, Any]]):
+        """Appends log entries and folds them into the weekly aggregates."""
+        routine_code = self.catalog.routine_code
+        pairs = [(date.fromisoformat(e['date']).toordinal(), routine_code(e['routine'])) for e in entries]
+        if not pairs:
+            return
+        days = np.fromiter((d for d, _ in pairs), dtype=np.int32, count=len(pairs))
+        codes = np.fromiter((c for _, c in pairs), dtype=np.int16, count=len(pairs))
+
+        needed = self.size + len(pairs)
+        if needed > len(self._days):
+            capacity = max(needed, 2 * len(self._days))
+            self._days = np.resize(self._days, capacity)
+            self._codes = np.resize(self._codes, capacity)
+        self._days[self.size:needed] = days
+        self._codes[self.size:needed] = codes
+        self.size = needed
+
+        self._accumulate(days, codes)
+        self._summary_cache.clear()
+
+    def append(self, entry: Dict[str, Any]):
+        self.extend([entry])
+
+    def _accumulate(self, days: np.ndarray, codes: np.ndarray):
+        weeks = (days.astype(np.int64) - 1) // 7
+        lo, hi = int(weeks.min()), int(weeks.max())
+        if self._first_week is None:
+            self._first_week = lo
+        # Grow the week range on either side to cover the new sessions
+        pad_before = max(self._first_week - lo, 0)
+        pad_after = max(hi - (self._first_week + len(self._sessions) - 1), 0)
+        if pad_before or pad_after:
+            self._sessions = np.pad(self._sessions, (pad_before, pad_after))
+            self._week_sets = np.pad(self._week_sets, ((pad_before, pad_after), (0, 0)))
+            self._week_reps = np.pad(self._week_reps, ((pad_before, pad_after), (0, 0)))
+            self._week_seconds = np.pad(self._week_seconds, ((pad_before, pad_after), (0, 0)))
+            self._week_b = np.pad(self._week_b, ((pad_before, pad_after), (0, 0)))
+            self._first_week -= pad_before
+
+        rows = weeks - self._first_week
+        codes = codes.astype(np.int64)
+        np.add.at(self._sessions, rows, 1)
+        np.add.at(self._week_sets, rows, self._sets[codes])
+        np.add.at(self._week_reps, rows, self._reps[codes])
+        np.add.at(self._week_seconds, rows, self._seconds[codes])
+        np.add.at(self._week_b, rows, (codes[:, None] >> self._bits) & 1)
+
+    def weekly_load(self) -> WeeklyLoad:
+        """Weekly volume per module and the A-vs-B split over time."""
+        first = self._first_week if self._first_week is not None else 0
+        sessions = self._sessions
+        with np.errstate(invalid='ignore', divide='ignore'):
+            b_share = np.where(sessions[:, None] > 0, self._week_b / sessions[:, None], np.nan)
+        return WeeklyLoad(
+            weeks=np.arange(first, first + len(sessions)),
+            sessions=sessions,
+            sets=self._week_sets,
+            reps=self._week_reps,
+            seconds=self._week_seconds,
+            b_share=b_share,
+        )
+
+    def summary(self, today: Optional[date] = None, recent_weeks: int = 4) -> AdherenceSummary:
+        """Streaks and adherence; cached until the next append."""
+        today = today or date.today()
+        key = (today.toordinal(), recent_weeks)
+        if key not in self._summary_cache:
+            self._summary_cache[key] = self._compute_summary(today.toordinal(), recent_weeks)
+        return self._summary_cache[key]
+
+    def _compute_summary(self, today: int, recent_weeks: int) -> AdherenceSummary:
+        if self.size == 0:
+            return AdherenceSummary(0, 0, 0, 0.0, 0.0)
+
+        # Streaks: lengths of runs of consecutive training days
+        unique_days = np.unique(self.days)
+        breaks = np.flatnonzero(np.diff(unique_days) != 1)
+        run_starts = np.concatenate(([0], breaks + 1))
+        run_ends = np.concatenate((breaks, [len(unique_days) - 1]))
+        run_lengths = run_ends - run_starts + 1
+        current = int(run_lengths[-1]) if unique_days[-1] >= today - 1 else 0
+
+        # Adherence against the weekly target, over the weeks up to and including this one
+        this_week = week_number(today)
+        sessions = self._sessions
+        first = self._first_week
+        week_counts = np.zeros(this_week - first + 1, dtype=np.int64) if this_week >= first else np.zeros(0, dtype=np.int64)
+        overlap = min(len(sessions), len(week_counts))
+        week_counts[:overlap] = sessions[:overlap]
+        ratio = np.minimum(week_counts / TARGET_SESSIONS_PER_WEEK, 1.0)
+        recent = ratio[-recent_weeks:] if len(ratio) else ratio
+
+        return AdherenceSummary(
+            total_sessions=self.size,
+            current_streak=current,
+            longest_streak=int(run_lengths.max()),
+            recent_adherence=float(recent.mean()) if len(recent) else 0.0,
+            weeks_on_target=float((week_counts >= TARGET_SESSIONS_PER_WEEK).mean()) if len(week_counts) else 0.0,
+        )
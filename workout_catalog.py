@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# Default location of the editable workout program
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workout_catalog.json')
+
+# Every main module offers exactly these choices on the selection page
+OPTION_KEYS = ('A', 'B')
+EXERCISE_UNITS = ("s", "reps")
+
+# Routine codes pack one bit per main module and must fit the resume token's one-byte field
+MAX_MAIN_MODULES = 8
+
+
+class CatalogError(ValueError):
+    """Raised when a workout catalog file is malformed."""
+
+
+# --- 1. Compiled Catalog Objects ---
+
+@dataclass(frozen=True, slots=True)
+class Exercise:
+    name: str
+    sets: int
+    unit: str
+    detail: str
+    reps: Optional[int] = None
+    time: Optional[int] = None
+
+    @property
+    def amount(self) -> int:
+        """The per-set target: reps for counted work, seconds for timed holds."""
+        return self.reps if self.reps is not None else self.time
+
+
+@dataclass(frozen=True, slots=True)
+class ModuleOption:
+    id: int # Position of the option within its module (A = 0, B = 1)
+    key: str
+    title: str
+    description: str
+    progression: Tuple[Exercise, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Module:
+    id: int # Position of the module within the session sequence
+    key: str
+    title: str
+    icon: str
+    options: Tuple[ModuleOption, ...]
+
+    def option(self, option_key: str) -> ModuleOption:
+        for option in self.options:
+            if option.key == option_key:
+                return option
+        raise KeyError(option_key)
+
+
+@dataclass(frozen=True, slots=True)
+class Catalog:
+    """The validated workout program, shared read-only by every session."""
+    modules: Tuple[Module, ...] # In session order, warmup first
+    main_module_keys: Tuple[str, ...]
+    version: str # Content hash; changes whenever the program is edited
+    module_index: Mapping[str, int] = field(compare=False) # module key -> id
+
+    @property
+    def full_sequence_keys(self) -> Tuple[str, ...]:
+        return tuple(m.key for m in self.modules)
+
+    def module(self, module_key: str) -> Module:
+        return self.modules[self.module_index[module_key]]
+
+    @property
+    def routine_count(self) -> int:
+        """Number of distinct A/B routines (2 ** number of main modules)."""
+        return 1 << len(self.main_module_keys)
+
+    def routine_code(self, options_map: Mapping[str, str]) -> int:
+        """Packs the main-module A/B choices into an int; bit i is set when module i chose B."""
+        code = 0
+        for bit, key in enumerate(self.main_module_keys):
+            if options_map.get(key, 'A') == 'B':
+                code |= 1 << bit
+        return code
+
+    def routine_options(self, code: int) -> Dict[str, str]:
+        """Unpacks a routine code into the {module_key: 'A'|'B'} map, warmup included."""
+        options = {self.modules[0].key: 'A'}
+        for bit, key in enumerate(self.main_module_keys):
+            options[key] = 'B' if code >> bit & 1 else 'A'
+        return options
+
+
+# --- 2. Validation and Loading ---
+
+def _require(condition: bool, where: str, message: str):
+    if not condition:
+        raise CatalogError(f"{where}: {message}")
+
+
+def _compile_exercise(raw: Any, where: str) -> Exercise:
+    _require(isinstance(raw, dict), where, "exercise must be an object")
+    for name in ('name', 'detail'):
+        _require(isinstance(raw.get(name), str) and raw[name], where, f"'{name}' must be a non-empty string")
+    _require(isinstance(raw.get('sets'), int) and raw['sets'] > 0, where, "'sets' must be a positive integer")
+    _require(raw.get('unit') in EXERCISE_UNITS, where, f"'unit' must be one of {EXERCISE_UNITS}")
+    amount_field = 'time' if raw['unit'] == "s" else 'reps'
+    _require(isinstance(raw.get(amount_field), int) and raw[amount_field] > 0, where,
+             f"'{amount_field}' must be a positive integer for unit '{raw['unit']}'")
+    return Exercise(
+        name=raw['name'],
+        sets=raw['sets'],
+        unit=raw['unit'],
+        detail=raw['detail'],
+        reps=raw.get('reps'),
+        time=raw.get('time'),
+    )
+
+
+def _compile_module(module_id: int, key: str, raw: Any, option_keys: Tuple[str, ...]) -> Module:
+    where = f"modules.{key}"
+    _require(isinstance(raw, dict), where, "module must be an object")
+    for name in ('title', 'icon'):
+        _require(isinstance(raw.get(name), str) and raw[name], where, f"'{name}' must be a non-empty string")
+    raw_options = raw.get('options')
+    _require(isinstance(raw_options, dict), where, "'options' must be an object")
+    _require(tuple(sorted(raw_options)) == option_keys, where, f"'options' must be exactly {list(option_keys)}")
+
+    options: List[ModuleOption] = []
+    for option_id, option_key in enumerate(option_keys):
+        raw_option = raw_options[option_key]
+        opt_where = f"{where}.options.{option_key}"
+        _require(isinstance(raw_option, dict), opt_where, "option must be an object")
+        for name in ('title', 'description'):
+            _require(isinstance(raw_option.get(name), str), opt_where, f"'{name}' must be a string")
+        progression = raw_option.get('progression')
+        _require(isinstance(progression, list) and progression, opt_where, "'progression' must be a non-empty list")
+        options.append(ModuleOption(
+            id=option_id,
+            key=option_key,
+            title=raw_option['title'],
+            description=raw_option['description'],
+            progression=tuple(
+                _compile_exercise(ex, f"{opt_where}.progression[{i}]") for i, ex in enumerate(progression)
+            ),
+        ))
+    return Module(id=module_id, key=key, title=raw['title'], icon=raw['icon'], options=tuple(options))
+
+
+def compile_catalog(raw: Any, version: str = "") -> Catalog:
+    """Validates raw catalog data and compiles it into immutable lookup objects."""
+    _require(isinstance(raw, dict), "catalog", "top level must be an object")
+    warmup_key = raw.get('warmup')
+    main_keys = raw.get('main_modules')
+    raw_modules = raw.get('modules')
+    _require(isinstance(warmup_key, str), "catalog", "'warmup' must name a module")
+    _require(isinstance(main_keys, list) and main_keys and all(isinstance(k, str) for k in main_keys),
+             "catalog", "'main_modules' must be a non-empty list of module keys")
+    _require(len(main_keys) <= MAX_MAIN_MODULES, "catalog",
+             f"'main_modules' lists {len(main_keys)} modules; at most {MAX_MAIN_MODULES} are supported")
+    _require(isinstance(raw_modules, dict), "catalog", "'modules' must be an object")
+
+    sequence = [warmup_key] + main_keys
+    _require(len(set(sequence)) == len(sequence), "catalog", "module keys in the sequence must be unique")
+    for key in sequence:
+        _require(key in raw_modules, "catalog", f"module '{key}' is sequenced but not defined")
+
+    modules = tuple(
+        # The warmup is fixed, so it only carries Option A
+        _compile_module(i, key, raw_modules[key], OPTION_KEYS[:1] if i == 0 else OPTION_KEYS)
+        for i, key in enumerate(sequence)
+    )
+    return Catalog(
+        modules=modules,
+        main_module_keys=tuple(main_keys),
+        version=version,
+        module_index=MappingProxyType({m.key: m.id for m in modules}),
+    )
+
+
+def load_catalog(path: str = CATALOG_PATH) -> Catalog:
+    """Reads, validates and compiles the catalog file at `path`."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    try:
+        raw = json.loads(content)
+    except ValueError as e:
+        raise CatalogError(f"{path}: invalid JSON ({e})") from e
+    return compile_catalog(raw, version=hashlib.sha1(content).hexdigest()[:12])
+
+
+def catalog_mtime(path: str = CATALOG_PATH) -> int:
+    """The catalog file's modification time, used as the hot-reload cache key."""
+    return os.stat(path).st_mtime_ns
+
+
+
+# --- 3. Hot Reload ---
+
+class CatalogReloader:
+    """Serves the newest valid version of a catalog file, re-reading it only when its mtime changes.
+
+    An edit that fails validation, or a file briefly missing while an editor
+    saves it, leaves the last good catalog in service; `error` describes the
+    problem until a valid version loads. Only the first load must succeed.
+    """
+
+    def __init__(self, path: str = CATALOG_PATH):
+        self.path = path
+        self.error: Optional[str] = None
+        self._mtime = catalog_mtime(path)
+        self._catalog = load_catalog(path)
+        self._lock = threading.Lock()
+
+    def current(self) -> Catalog:
+        try:
+            mtime = catalog_mtime(self.path)
+        except OSError as e:
+            self.error = f"{self.path}: {e.strerror or e}"
+            return self._catalog
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    try:
+                        self._catalog = load_catalog(self.path)
+                        self.error = None
+                    except (CatalogError, OSError) as e:
+                        self.error = str(e)
+                    # A bad version is not re-read on every run, only once it changes again
+                    self._mtime = mtime
+        return self._catalog
@@ -0,0 +1,69 @@
+"""Command-line export and import of the workout log.
+
+Imports nothing from Streamlit, so it starts quickly; `python
+ankle_fitness_app.py export|import ...` dispatches here as well.
+
+    python workout_cli.py export --contact 0123456789 --from 2026-01-01 --out history.csv
+    python workout_cli.py import history.jsonl --user u12
+"""
+import argparse
+import sys
+from typing import Optional, Sequence
+
+from log_store import SQLiteLogStore
+from log_transfer import EXPORT_FORMATS, detect_format, import_entries, parse_rows, write_export
+from user_registry import UserRegistry
+from workout_catalog import load_catalog
+
+
+def cli(argv: Optional[Sequence[str]] = None) -> int:
+    """Command-line export and import of the workout log, for runs outside `streamlit run`."""
+    parser = argparse.ArgumentParser(description="Export or import workout history.")
+    parser.add_argument('--db', default=None, help="Workout log database (default: ANKLE_FITNESS_DB or workout_log.db).")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_cmd = commands.add_parser('export', help="Stream log entries to CSV or JSONL.")
+    export_cmd.add_argument('--out', default='-', help="Output file, or - for stdout.")
+    export_cmd.add_argument('--format', choices=EXPORT_FORMATS, default=None, help="Defaults to the --out extension, else csv.")
+    export_cmd.add_argument('--user', action='append', default=None, help="User key to include (repeatable).")
+    export_cmd.add_argument('--contact', action='append', default=[], help="Contact number of a user to include (repeatable).")
+    export_cmd.add_argument('--from', dest='first_date', default=None, help="First date, YYYY-MM-DD.")
+    export_cmd.add_argument('--to', dest='last_date', default=None, help="Last date, YYYY-MM-DD.")
+
+    import_cmd = commands.add_parser('import', help="Bulk-load log entries from CSV or JSONL.")
+    import_cmd.add_argument('path', help="Input file, or - for stdin.")
+    import_cmd.add_argument('--format', choices=EXPORT_FORMATS, default=None, help="Defaults to the file extension, else csv.")
+    import_cmd.add_argument('--user', default=None, help="Assign every imported entry to this user key.")
+    import_cmd.add_argument('--chunk-rows', type=int, default=5000, help="Rows per write transaction.")
+    args = parser.parse_args(argv)
+
+    store = SQLiteLogStore(args.db)
+    try:
+        if args.command == 'export':
+            users = list(args.user) if args.user else None
+            if args.contact:
+                registry = UserRegistry(store.pool)
+                records = [registry.lookup(number) for number in args.contact]
+                users = (users or []) + [r.user_key for r in records if r is not None]
+            fmt = args.format or (detect_format(args.out) if args.out != '-' else 'csv')
+            entries = store.iter_range(users, args.first_date, args.last_date)
+            module_keys = load_catalog().full_sequence_keys
+            if args.out == '-':
+                rows = write_export(entries, fmt, module_keys, sys.stdout)
+            else:
+                with open(args.out, 'w', encoding='utf-8', newline='') as out:
+                    rows = write_export(entries, fmt, module_keys, out)
+            print(f"Exported {rows} entries.", file=sys.stderr)
+        else:
+            fmt = args.format or (detect_format(args.path) if args.path != '-' else 'csv')
+            source = sys.stdin if args.path == '-' else open(args.path, encoding='utf-8', newline='')
+            with source:
+                result = import_entries(store, parse_rows(source, fmt, load_catalog().full_sequence_keys), chunk_rows=args.chunk_rows, user=args.user)
+            print(f"Imported {result.imported} entries, skipped {result.skipped} malformed rows.", file=sys.stderr)
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
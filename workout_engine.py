@@ -0,0 +1,155 @@
+from datetime import date, datetime
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+from workout_catalog import Catalog, Exercise, Module, ModuleOption
+
+
+# --- 1. Compiled Routine Plan ---
+
+class PlanStep(NamedTuple):
+    """A single set within the flattened routine, resolved from a cursor position."""
+    module: Module
+    option: ModuleOption
+    exercise_index: int
+    exercise: Exercise
+    set_number: int
+
+    @property
+    def exercise_count(self) -> int:
+        return len(self.option.progression)
+
+
+class RoutinePlan:
+    """The selected A/B routine flattened into one array of set-steps.
+
+    Built once when a workout starts, so every rerun resolves progress, the
+    current exercise and the next step by index instead of walking the data.
+    The plan keeps its own references into the catalog, so a catalog reload
+    never disturbs a workout that is already running.
+    """
+
+    __slots__ = ('catalog_version', 'option_ids', 'exercises', 'exercise_offsets', 'step_exercise')
+
+    def __init__(self, catalog: Catalog, selected_options_map: Dict[str, str]):
+        self.catalog_version = catalog.version
+        # Chosen option id per module, in session order
+        self.option_ids: Tuple[int, ...] = tuple(
+            module.option(selected_options_map.get(module.key, 'A')).id for module in catalog.modules
+        )
+
+        # One entry per exercise: (module, option, exercise_index, exercise)
+        exercises: List[Tuple[Module, ModuleOption, int, Exercise]] = []
+        for module, option_id in zip(catalog.modules, self.option_ids):
+            option = module.options[option_id]
+            for ex_idx, ex in enumerate(option.progression):
+                exercises.append((module, option, ex_idx, ex))
+        self.exercises: Tuple[Tuple[Module, ModuleOption, int, Exercise], ...] = tuple(exercises)
+
+        # Prefix sums of sets: exercise i covers steps [offsets[i], offsets[i + 1])
+        offsets = [0]
+        step_exercise: List[int] = []
+        for i, (_, _, _, ex) in enumerate(self.exercises):
+            offsets.append(offsets[-1] + ex.sets)
+            step_exercise.extend([i] * ex.sets)
+        self.exercise_offsets: Tuple[int, ...] = tuple(offsets)
+        self.step_exercise: Tuple[int, ...] = tuple(step_exercise)
+
+    @property
+    def total_steps(self) -> int:
+        return self.exercise_offsets[-1]
+
+    def step(self, cursor: int) -> PlanStep:
+        """Resolves the set-step at the given cursor position."""
+        ex_pos = self.step_exercise[cursor]
+        module, option, ex_idx, exercise = self.exercises[ex_pos]
+        return PlanStep(
+            module=module,
+            option=option,
+            exercise_index=ex_idx,
+            exercise=exercise,
+            set_number=cursor - self.exercise_offsets[ex_pos] + 1,
+        )
+
+    def next_step(self, cursor: int) -> Optional[PlanStep]:
+        """Returns the step after the cursor, or None if the cursor is on the last set."""
+        return self.step(cursor + 1) if cursor + 1 < self.total_steps else None
+
+    def progress(self, cursor: int) -> float:
+        """Fraction of sets completed before the cursor position."""
+        return (cursor / self.total_steps) if self.total_steps > 0 else 0
+
+
+
+# --- 2. Workout State Machine ---
+
+def default_options_map(catalog: Catalog) -> Dict[str, str]:
+    """Returns the default A/B choice for every module (Option A throughout)."""
+    return {key: 'A' for key in catalog.full_sequence_keys}
+
+
+class WorkoutEngine:
+    """Headless owner of the routine choice and cursor state for one user session.
+
+    Holds no UI state; the Streamlit views keep one instance in session state
+    and translate its return values into view changes.
+    """
+
+    __slots__ = ('catalog', 'selected_options_map', 'routine_plan', 'step_cursor')
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog # Used for new plans; a running plan keeps the version it was built from
+        # User's A/B choice for each module: {'plyometrics': 'A', 'lowerStrength': 'B', ...}
+        self.selected_options_map: Dict[str, str] = default_options_map(catalog)
+        self.routine_plan: Optional[RoutinePlan] = None # Compiled when the workout starts
+        self.step_cursor = 0 # Index of the current set-step within the routine plan
+
+    def get_progression(self, module_key: str) -> Tuple[Exercise, ...]:
+        """Retrieves the progression based on the selected option for that module."""
+        option_key = self.selected_options_map.get(module_key, 'A') # Default safety to 'A'
+        return self.catalog.module(module_key).option(option_key).progression
+
+    def start(self) -> bool:
+        """Compiles the selected routine and rewinds the cursor; False if a module has no choice."""
+        for key in self.catalog.main_module_keys:
+            if self.selected_options_map.get(key) is None:
+                return False
+        self.routine_plan = RoutinePlan(self.catalog, self.selected_options_map)
+        self.step_cursor = 0
+        return True
+
+    def resume(self, step_cursor: int) -> bool:
+        """Recompiles the selected routine and jumps to a saved cursor position."""
+        if not self.start():
+            return False
+        self.step_cursor = min(max(step_cursor, 0), self.routine_plan.total_steps - 1)
+        return True
+
+    def reset(self):
+        """Drops the running routine and restores the default selections."""
+        self.routine_plan = None
+        self.step_cursor = 0
+        self.selected_options_map = default_options_map(self.catalog)
+
+    def current_step(self) -> Optional[PlanStep]:
+        """Returns the set-step under the cursor, or None if no routine is running."""
+        if self.routine_plan is None or self.step_cursor >= self.routine_plan.total_steps:
+            return None
+        return self.routine_plan.step(self.step_cursor)
+
+    def complete_set(self) -> bool:
+        """Advances the cursor by one set; returns True when that set finished the routine."""
+        if self.step_cursor < self.routine_plan.total_steps - 1:
+            self.step_cursor += 1
+            return False
+        self.step_cursor = self.routine_plan.total_steps
+        return True
+
+    def build_log_entry(self, user: Optional[str], workout_date: date, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Builds the log record for a completed routine."""
+        now = now or datetime.now()
+        return {
+            'date': workout_date.isoformat(),
+            'time': now.strftime("%H:%M:%S"),
+            'routine': self.selected_options_map.copy(), # Log the specific A/B choices made
+            'user': user
+        }